@@ -7,6 +7,12 @@ using TypedDict for better type checking and linting.
 from typing import Literal, Optional, TypedDict
 
 
+class TestConfig(TypedDict):
+    """Test run configuration schema."""
+
+    fast_confirm: bool
+
+
 class GitConfig(TypedDict):
     """Git configuration schema."""
 
@@ -47,6 +53,7 @@ class AgentConfig(TypedDict):
 
     max_iterations: int
     test_command: str
+    test: TestConfig
     git: GitConfig
     llm: LLMConfig
     metrics: MetricsConfig
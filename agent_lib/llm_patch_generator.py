@@ -19,90 +19,443 @@ Typical usage:
 """
 
 import ast
+import bisect
+import functools
+import hashlib
 import logging
+import os
+import re
 import subprocess
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from agent_lib.prompt_templates import format_patch_prompt
 from agent_lib.test_runner import TestFailure
 
+# Unified-diff hunk header: "@@ -old_start[,old_count] +new_start[,new_count] @@"
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
 
-def apply_diff_to_source(original_source: str, diff_content: str) -> str:
-    """Apply a unified diff to source code in memory.
+
+def _parse_hunks(diff_content: str) -> List[Tuple[int, List[str]]]:
+    """Split the first file of a unified diff into hunks.
+
+    The line counts in hunk headers are not trusted (LLM-generated diffs
+    frequently get them wrong), so a hunk body simply runs until the next
+    hunk header. Hunks belong to a single source file, so parsing stops at
+    the headers of the next file (a ``diff`` line, or a ``---`` line
+    followed by a ``+++`` line).
 
     Args:
-        original_source: The original source code
-        diff_content: The unified diff to apply
+        diff_content: The unified diff to split
 
     Returns:
-        The modified source code
-
-    Note:
-        This is a simplified diff parser for basic patches.
-        For production use, consider using the `patch` library.
+        List of (start index, body lines) tuples, where start index is the
+        0-based index of the first original line the hunk applies to
     """
-    lines = original_source.splitlines(keepends=True)
-    diff_lines = diff_content.splitlines()
-
-    # Find the @@ header line
-    hunk_start = None
-    for i, line in enumerate(diff_lines):
-        if line.startswith("@@"):
-            hunk_start = (
-                i + 1
-            )  # Parse the hunk header: @@ -old_start,old_count +new_start,new_count @@
-            # We don't need to parse the line numbers for our implementation
+    hunks: List[Tuple[int, List[str]]] = []
+    body: Optional[List[str]] = None
+    lines = diff_content.splitlines()
+
+    for i, line in enumerate(lines):
+        # Only run the header regex on lines that can be hunk headers
+        header = _HUNK_HEADER_RE.match(line) if line[:2] == "@@" else None
+        if header:
+            old_start = int(header.group(1))
+            # A zero-length hunk names the line *after* which to insert
+            start = old_start if header.group(2) == "0" else old_start - 1
+            body = []
+            hunks.append((start, body))
+        elif hunks and (
+            line.startswith("diff ")
+            or (
+                line.startswith("--- ")
+                and i + 1 < len(lines)
+                and lines[i + 1].startswith("+++ ")
+            )
+        ):
+            # Headers of the next file; its hunks apply to another source
             break
+        elif body is not None:
+            body.append(line)
 
-    if hunk_start is None:
-        return original_source  # No valid hunk found
+    return hunks
 
-    # Apply the changes
-    result_lines = []
-    original_line_idx = 0
 
-    for line in diff_lines[hunk_start:]:
+def _hunk_old_length(body: List[str]) -> int:
+    """Count the original lines consumed by a hunk body."""
+    return sum(1 for line in body if line[:1] not in ("+", "\\"))
 
-        if line.startswith(" "):
-            # Context line - copy from original
-            if original_line_idx < len(lines):
-                result_lines.append(lines[original_line_idx])
-                original_line_idx += 1
-        elif line.startswith("-"):
-            # Deletion - skip original line
-            original_line_idx += 1
-        elif line.startswith("+"):
-            # Addition - add new line, preserving newline consistency
-            # Check if the line already ends with newline
-            new_content = line[1:]
-            if not new_content.endswith(("\n", "\r\n")):
-                # Determine appropriate newline from existing content
+
+def _apply_hunks(lines: Sequence[str], hunks: List[Tuple[int, List[str]]]) -> str:
+    """Apply parsed hunks to a list of original lines (with line endings).
+
+    Args:
+        lines: The original lines, as produced by ``splitlines(keepends=True)``
+        hunks: Hunks as returned by ``_parse_hunks``, positioned against lines
+
+    Returns:
+        The modified source code
+    """
+    result_lines: List[str] = []
+    original_line_idx = 0
+
+    for start, body in hunks:
+        # Copy the untouched original lines that precede this hunk
+        if start > original_line_idx:
+            result_lines.extend(lines[original_line_idx:start])
+            original_line_idx = min(start, len(lines))
+
+        for line in body:
+            # Dispatch on the marker character once instead of re-scanning
+            # the line with a startswith() per branch
+            marker = line[:1]
+            if marker == "+":
+                # Addition - terminate a preceding unterminated last line first
+                if result_lines and not result_lines[-1].endswith("\n"):
+                    result_lines[-1] += "\n"
+                # Match the newline style of the surrounding original content
                 if original_line_idx > 0 and lines[original_line_idx - 1].endswith(
                     "\r\n"
                 ):
-                    new_content += "\r\n"
-                elif original_line_idx > 0 and lines[original_line_idx - 1].endswith(
-                    "\n"
-                ):
-                    new_content += "\n"
+                    result_lines.append(line[1:] + "\r\n")
                 else:
-                    new_content += "\n"
-            result_lines.append(new_content)
+                    result_lines.append(line[1:] + "\n")
+            elif marker == "-":
+                # Deletion - skip original line
+                original_line_idx += 1
+            elif marker == " " or not marker:
+                # Context line (editors often strip the lone space of blank ones)
+                if original_line_idx < len(lines):
+                    result_lines.append(lines[original_line_idx])
+                    original_line_idx += 1
+            # Anything else ("\\ No newline at end of file") carries no content
 
     # Add remaining original lines
-    while original_line_idx < len(lines):
-        result_lines.append(lines[original_line_idx])
-        original_line_idx += 1
+    result_lines.extend(lines[original_line_idx:])
 
     return "".join(result_lines)
 
 
+def apply_diff_to_source(original_source: str, diff_content: str) -> str:
+    """Apply a unified diff to source code in memory.
+
+    Every hunk in the diff is applied in order, positioned by the old-file
+    start line from its ``@@`` header.
+
+    Args:
+        original_source: The original source code
+        diff_content: The unified diff to apply
+
+    Returns:
+        The modified source code, or the original source unchanged if the
+        diff contains no hunks
+    """
+    hunks = _parse_hunks(diff_content)
+    if not hunks:
+        return original_source  # No valid hunk found
+
+    return _apply_hunks(original_source.splitlines(keepends=True), hunks)
+
+
+def _split_file_diffs(diff_content: str) -> List[Tuple[str, str, str]]:
+    """Split a multi-file unified diff into one section per file.
+
+    Args:
+        diff_content: The unified diff to split
+
+    Returns:
+        List of (old path, new path, section) tuples, with the ``a/`` and
+        ``b/`` prefixes removed from the paths
+    """
+    sections: List[Tuple[str, str, str]] = []
+    old_path = new_path = ""
+    body: List[str] = []
+    for line in diff_content.splitlines(keepends=True):
+        if line.startswith("--- "):
+            if new_path:
+                sections.append((old_path, new_path, "".join(body)))
+            old_path, new_path, body = line[4:].strip(), "", []
+        elif line.startswith("+++ ") and not new_path:
+            new_path = line[4:].strip()
+        elif new_path:
+            body.append(line)
+    if new_path:
+        sections.append((old_path, new_path, "".join(body)))
+
+    return [
+        (old.removeprefix("a/"), new.removeprefix("b/"), section)
+        for old, new, section in sections
+    ]
+
+
+def diff_file_paths(diff_content: str) -> List[str]:
+    """List the repository paths a unified diff creates, changes or deletes.
+
+    Args:
+        diff_content: The unified diff to inspect
+
+    Returns:
+        Paths from the diff's file headers in order of appearance, without
+        duplicates or ``/dev/null``
+    """
+    paths: Dict[str, None] = {}
+    for old_path, new_path, _ in _split_file_diffs(diff_content):
+        for path in (old_path, new_path):
+            if path != "/dev/null":
+                paths[path] = None
+    return list(paths)
+
+
+def is_cosmetic_patch(diff_content: str, repo_path: Path) -> bool:
+    """Check whether a patch only changes comments, blank lines or formatting.
+
+    Each patched file is parsed before and after the diff and the ASTs are
+    compared, so a True result means the patched code behaves the same and
+    re-running the tests cannot change their outcome.
+
+    Args:
+        diff_content: The unified diff to inspect
+        repo_path: Path to the repository the diff applies to
+
+    Returns:
+        True if every file in the diff is Python source whose AST the patch
+        leaves unchanged; False otherwise or if that cannot be determined
+    """
+    files = _split_file_diffs(diff_content)
+    if not files:
+        return False
+
+    for old_path, new_path, section in files:
+        if old_path != new_path or not new_path.endswith(".py"):
+            return False  # Created, deleted, renamed or non-Python files
+        try:
+            original_source = (repo_path / old_path).read_text(encoding="utf-8")
+            patched_source = apply_diff_to_source(original_source, section)
+            if ast.dump(ast.parse(original_source)) != ast.dump(
+                ast.parse(patched_source)
+            ):
+                return False
+        except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+            return False
+
+    return True
+
+
+def apply_diff_exactly(original_source: str, diff_content: str) -> Optional[str]:
+    """Apply a single-file unified diff only where it matches exactly.
+
+    Unlike ``apply_diff_to_source``, nothing is guessed: every hunk must sit
+    at the line its header names, every context and removed line must match
+    the original, and the header line counts must be right. Anything this
+    does not reproduce byte for byte like ``git apply`` (CRLF files, a
+    missing final newline, ``\\ No newline`` markers) is refused as well.
+
+    Args:
+        original_source: The original source code
+        diff_content: A unified diff for that one file
+
+    Returns:
+        The modified source code, or None if the diff does not apply exactly
+    """
+    if "\r" in original_source or not original_source.endswith("\n"):
+        return None
+
+    hunks: List[Tuple[int, int, int, List[str]]] = []
+    body: Optional[List[str]] = None
+    for line in diff_content.splitlines():
+        if line[:2] == "@@":
+            header = _HUNK_HEADER_RE.match(line)
+            if header is None:
+                return None
+            old_start, old_count, _, new_count = header.groups()
+            body = []
+            hunks.append(
+                (
+                    int(old_start),
+                    int(old_count or 1),
+                    int(new_count or 1),
+                    body,
+                )
+            )
+        elif body is not None:
+            body.append(line)
+    if not hunks:
+        return None
+
+    lines = original_source.splitlines(keepends=True)
+    result: List[str] = []
+    position = 0
+    for old_start, old_count, new_count, body in hunks:
+        # A zero-length hunk names the line *after* which to insert
+        start = old_start if old_count == 0 else old_start - 1
+        if start < position:
+            return None  # Overlapping or out-of-order hunks
+        result.extend(lines[position:start])
+        position = start
+
+        old_seen = new_seen = 0
+        for line in body:
+            marker, text = line[:1], line[1:] + "\n"
+            if marker == "+":
+                result.append(text)
+                new_seen += 1
+            elif marker in (" ", "-"):
+                if position >= len(lines) or lines[position] != text:
+                    return None
+                if marker == " ":
+                    result.append(text)
+                    new_seen += 1
+                old_seen += 1
+                position += 1
+            else:
+                return None  # No-newline markers or malformed lines
+        if (old_seen, new_seen) != (old_count, new_count):
+            return None
+
+    result.extend(lines[position:])
+    return "".join(result)
+
+
+def _has_file_hunk(diff_content: str) -> bool:
+    """Check that a diff has a ``+++`` file header followed by a hunk header.
+
+    This is a necessary condition for ``git apply`` to accept the diff, so a
+    False result lets callers reject it in-process.
+    """
+    seen_file_header = False
+    for line in diff_content.splitlines():
+        if line.startswith("+++ "):
+            seen_file_header = True
+        elif seen_file_header and _HUNK_HEADER_RE.match(line):
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=4)
+def _statement_index(
+    source: str,
+) -> Optional[Tuple[Tuple[str, ...], Tuple[int, ...]]]:
+    """Index a module by the first line of each top-level statement.
+
+    The boundaries partition the file into chunks that each parse on their
+    own, so a patch confined to a few chunks can be syntax-checked without
+    re-parsing the rest of the file. Cached so that retries validating
+    against the same original source only parse it once.
+
+    Args:
+        source: The original source code
+
+    Returns:
+        Tuple of (lines with endings, sorted 0-based boundary indices), or
+        None if the source itself does not parse
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    boundaries = {0}
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        boundaries.add(min([node.lineno] + [d.lineno for d in decorators]) - 1)
+
+    return tuple(source.splitlines(keepends=True)), tuple(sorted(boundaries))
+
+
 # Constants for LLM configuration
 DEFAULT_TIMEOUT_SECONDS = 30
 MAX_PROMPT_LENGTH = 8192
 DIFF_VALIDATION_TIMEOUT = 10
 
+# Marker left in place of the middle frames of an oversized traceback
+_TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+# Appended to the original prompt when a generated patch fails AST validation
+_RETRY_SUFFIX = """
+
+IMPORTANT: Your previous patch had syntax errors.
+Please ensure the patch compiles without syntax errors.
+
+Generate a corrected unified diff patch:"""
+
+# Generated patches are kept per repository so a recurring failure does not
+# go back to the LLM; set DEV_AGENT_CACHE=off to always generate afresh
+PATCH_CACHE_DIR = ".dev-agent-cache"
+
+# Details that differ between runs of the same failure: memory addresses,
+# timestamps, temporary paths and test durations
+_VOLATILE_OUTPUT_RE = re.compile(
+    r"0x[0-9a-fA-F]+"
+    r"|\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?"
+    rf"|{re.escape(tempfile.gettempdir())}[/\\]\S*"
+    r"|\b\d+\.\d+s\b"
+)
+
+
+def _truncate_error_output(error_output: str, limit: int = MAX_PROMPT_LENGTH) -> str:
+    """Trim an oversized error output to its head and tail.
+
+    The start of a traceback names where the failure originated and the end
+    holds the assertion or exception, so the middle frames are dropped.
+
+    Args:
+        error_output: The test error output to trim
+        limit: Maximum number of characters of error output to keep
+
+    Returns:
+        The error output, unchanged if it already fits within limit
+    """
+    if len(error_output) <= limit:
+        return error_output
+    half = limit // 2
+    return error_output[:half] + _TRUNCATION_MARKER + error_output[-half:]
+
+
+def _normalize_error_output(error_output: str) -> str:
+    """Blank out the run-specific details of an error output.
+
+    Args:
+        error_output: The test error output to normalize
+
+    Returns:
+        The error output with addresses, timestamps, temporary paths and
+        durations replaced by a placeholder
+    """
+    return _VOLATILE_OUTPUT_RE.sub("<*>", error_output)
+
+
+def _read_cached_patch(cache_file: Path) -> Optional[str]:
+    """Return a previously stored diff, or None if there is none."""
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _store_cached_patch(cache_file: Path, diff_content: str) -> None:
+    """Store a diff for reuse, ignoring any failure to write it.
+
+    The cache directory ignores its own contents so it never shows up as
+    untracked files in the repository.
+    """
+    cache_dir = cache_file.parent
+    tmp_name = None
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        gitignore = cache_dir / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("*\n", encoding="utf-8")
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(diff_content)
+        os.replace(tmp_name, cache_file)
+    except OSError:
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
 
 class PatchGenerationError(Exception):
     """Raised when patch generation fails."""
@@ -110,12 +463,18 @@ class PatchGenerationError(Exception):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PatchResult:
-    """Represents the result of generating a patch."""
+    """Represents the result of generating a patch.
+
+    Instances are immutable so that a result can be shared or cached safely
+    between retries.
+    """
 
     diff_content: str
     confidence_score: Optional[float] = None
+    # Where the diff is cached once it is known to fix the failure
+    cache_file: Optional[Path] = None
 
 
 class LLMPatchGenerator:
@@ -129,6 +488,8 @@ class LLMPatchGenerator:
                        or backend specification (e.g., "ollama:codellama")
         """
         self.model_path = model_path
+        # Resolve the backend once; file paths default to llama-cpp
+        self._backend = "ollama" if model_path.startswith("ollama:") else "llama-cpp"
 
     def generate_patch(self, test_failure: TestFailure, repo_path: Path) -> PatchResult:
         """Generate a patch to fix the given test failure.
@@ -160,6 +521,31 @@ class LLMPatchGenerator:
             else:
                 raise
 
+    async def generate_patch_async(
+        self, test_failure: TestFailure, repo_path: Path
+    ) -> PatchResult:
+        """Generate a patch without blocking the running event loop.
+
+        The blocking backend call runs in a worker thread, so patches for
+        several failing tests can be generated concurrently with
+        ``asyncio.gather`` instead of one after another.
+
+        Args:
+            test_failure: The test failure information
+            repo_path: Path to the repository where the test failure occurred
+
+        Returns:
+            PatchResult containing the generated diff
+
+        Raises:
+            PatchGenerationError: If patch generation fails
+        """
+        # asyncio is imported here: it is costly to import and only async
+        # callers need it, not the dev-agent CLI
+        import asyncio
+
+        return await asyncio.to_thread(self.generate_patch, test_failure, repo_path)
+
     def validate_patch(self, diff_content: str, repo_path: Path) -> bool:
         """Validate that a patch can be applied using git apply --check.
 
@@ -169,12 +555,17 @@ class LLMPatchGenerator:
         Returns:
             True if the patch is valid and can be applied, False otherwise
         """
+        # git rejects diffs without a file header and hunk; skip the spawn
+        if not _has_file_hunk(diff_content):
+            return False
+
         try:
-            # Use git apply --check to validate the patch without applying it
+            # Use git apply --check to validate the patch without applying it.
+            # Only the return code is used, so send bytes and skip decoding
+            # the output.
             result = subprocess.run(
                 ["git", "apply", "--check"],
-                input=diff_content,
-                text=True,
+                input=diff_content.encode("utf-8"),
                 cwd=repo_path,
                 capture_output=True,
             )
@@ -182,17 +573,58 @@ class LLMPatchGenerator:
         except (subprocess.SubprocessError, FileNotFoundError):
             return False
 
-    def ast_validate_patch(self, diff_content: str, original_source: str) -> bool:
+    def ast_validate_patch(
+        self,
+        diff_content: str,
+        original_source: str,
+        file_path: Optional[str] = None,
+    ) -> bool:
         """Validate that applying a patch results in syntactically correct Python.
 
+        Only the top-level statements touched by the diff are re-parsed; the
+        original source is indexed once and reused across retries. The whole
+        patched file is parsed when the slice fails or cannot be isolated.
+
         Args:
             diff_content: The unified diff content to validate
             original_source: The original source code
+            file_path: Repository path of original_source. If given, only the
+                diff's section for that file is validated, and a diff with
+                file headers but no section for it is invalid; otherwise the
+                first file in the diff is assumed to be it
 
         Returns:
             True if the patched code is syntactically valid, False otherwise
         """
         try:
+            if file_path is not None:
+                sections = _split_file_diffs(diff_content)
+                if sections:
+                    # Hunks for other files say nothing about this source
+                    diff_content = "".join(
+                        section
+                        for old_path, new_path, section in sections
+                        if file_path in (old_path, new_path)
+                    )
+                    if not diff_content:
+                        return False
+            hunks = _parse_hunks(diff_content)
+            index = _statement_index(original_source) if hunks else None
+            if index is not None:
+                lines, boundaries = index
+                first = min(start for start, _ in hunks)
+                last = max(start + _hunk_old_length(body) for start, body in hunks)
+                # Widen to whole top-level statements around the touched lines
+                lo = boundaries[max(bisect.bisect_right(boundaries, first) - 1, 0)]
+                hi_pos = bisect.bisect_left(boundaries, max(last, lo + 1))
+                hi = boundaries[hi_pos] if hi_pos < len(boundaries) else len(lines)
+                rebased = [(start - lo, body) for start, body in hunks]
+                try:
+                    ast.parse(_apply_hunks(lines[lo:hi], rebased))
+                    return True
+                except SyntaxError:
+                    pass  # Confirm against the whole file below
+
             # Apply the diff to the original source
             modified_source = apply_diff_to_source(original_source, diff_content)
 
@@ -228,32 +660,41 @@ class LLMPatchGenerator:
         except (FileNotFoundError, UnicodeDecodeError) as e:
             raise PatchGenerationError(f"Cannot read source file {file_path}: {e}")
 
-        original_prompt = None
+        cache_file = self._patch_cache_file(test_failure, repo_path, original_source)
+        if cache_file is not None:
+            cached = _read_cached_patch(cache_file)
+            if cached is not None:
+                return PatchResult(diff_content=cached, cache_file=cache_file)
+
+        retry_failure: Optional[TestFailure] = None
 
         for attempt in range(max_retries + 1):
             try:
                 if attempt == 0:
                     # First attempt - normal generation
-                    diff_content = self._call_llm(test_failure, repo_path)
-                    original_prompt = f"Fix test failure: {test_failure.error_output}"
+                    diff_content = self._call_llm(
+                        test_failure, repo_path, file_content=original_source
+                    )
                 else:
-                    # Retry with syntax error hint
-                    retry_prompt = f"""{original_prompt}
-
-IMPORTANT: Your previous patch had syntax errors.
-Please ensure the patch compiles without syntax errors.
-
-Generate a corrected unified diff patch:"""
-                    # Create a mock test failure for the retry
-                    retry_failure = TestFailure(
-                        test_name=test_failure.test_name,
-                        file_path=test_failure.file_path,
-                        error_output=retry_prompt,
+                    # Retry with syntax error hint; the prompt is identical for
+                    # every retry, so build the mock test failure only once
+                    if retry_failure is None:
+                        retry_failure = TestFailure(
+                            test_name=test_failure.test_name,
+                            file_path=test_failure.file_path,
+                            error_output=(
+                                f"Fix test failure: {test_failure.error_output}"
+                                + _RETRY_SUFFIX
+                            ),
+                        )
+                    diff_content = self._call_llm(
+                        retry_failure, repo_path, file_content=original_source
                     )
-                    diff_content = self._call_llm(retry_failure, repo_path)
                     # Validate syntax using AST
-                if self.ast_validate_patch(diff_content, original_source):
-                    return PatchResult(diff_content=diff_content)
+                if self._ast_validate_files(
+                    diff_content, repo_path, test_failure.file_path, original_source
+                ):
+                    return PatchResult(diff_content=diff_content, cache_file=cache_file)
                 else:
                     # Log diagnostic information for AST validation failure
                     logging.error(
@@ -287,7 +728,96 @@ Generate a corrected unified diff patch:"""
         # This should never be reached, but for type safety
         raise PatchGenerationError("Unexpected error in patch generation")
 
-    def _call_llm(self, test_failure: TestFailure, repo_path: Path) -> str:
+    def _ast_validate_files(
+        self,
+        diff_content: str,
+        repo_path: Path,
+        file_path: str,
+        original_source: str,
+    ) -> bool:
+        """AST-validate the diff's section for every Python file it changes.
+
+        Args:
+            diff_content: The unified diff content to validate
+            repo_path: Path to the repository the diff applies to
+            file_path: Repository path of the failing file
+            original_source: Source of the failing file, already read
+
+        Returns:
+            True if every patched Python file is syntactically valid
+        """
+        sections = _split_file_diffs(diff_content)
+        if not sections:
+            # Bare hunks are taken to be for the failing file
+            return self.ast_validate_patch(diff_content, original_source)
+
+        for old_path, new_path, _ in sections:
+            # A deleted file cannot be left with a syntax error
+            if new_path == "/dev/null" or not new_path.endswith(".py"):
+                continue
+            if old_path == "/dev/null":
+                source = ""
+            elif new_path == file_path:
+                source = original_source
+            else:
+                try:
+                    source = (repo_path / old_path).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    return False
+            if not self.ast_validate_patch(diff_content, source, new_path):
+                return False
+        return True
+
+    def cache_patch(self, patch_result: PatchResult) -> None:
+        """Cache a patch so the same failure is fixed without the LLM next time.
+
+        Only call this once the patch has been applied and the tests pass;
+        generation alone only guarantees the diff is syntactically valid.
+
+        Args:
+            patch_result: A result returned by generate_patch
+        """
+        if patch_result.cache_file is not None:
+            _store_cached_patch(patch_result.cache_file, patch_result.diff_content)
+
+    def _patch_cache_file(
+        self, test_failure: TestFailure, repo_path: Path, original_source: str
+    ) -> Optional[Path]:
+        """Locate the cached patch for a failure of the given source.
+
+        The key covers everything the prompt is built from, so a cached diff
+        is only reused when the LLM would be asked the same question again.
+
+        Args:
+            test_failure: The test failure information
+            repo_path: Path to the repository where the test failure occurred
+            original_source: Current source of the failing file
+
+        Returns:
+            Path of the cache entry, or None if DEV_AGENT_CACHE is "off"
+        """
+        if os.environ.get("DEV_AGENT_CACHE", "").lower() == "off":
+            return None
+        key = hashlib.blake2b(
+            "\0".join(
+                (
+                    self.model_path,
+                    test_failure.test_name,
+                    test_failure.file_path,
+                    _normalize_error_output(test_failure.error_output),
+                    original_source,
+                )
+            ).encode("utf-8", "surrogatepass"),
+            digest_size=16,
+        ).hexdigest()
+        return repo_path / PATCH_CACHE_DIR / f"{key}.diff"
+
+    def _call_llm(
+        self,
+        test_failure: TestFailure,
+        repo_path: Path,
+        file_content: Optional[str] = None,
+    ) -> str:
         """Call the LLM to generate a patch for the test failure.
 
         This method constructs a prompt with the test failure context and
@@ -296,6 +826,8 @@ Generate a corrected unified diff patch:"""
         Args:
             test_failure: The test failure information
             repo_path: Path to the repository
+            file_content: Source of the failing file if the caller already
+                read it; read from disk otherwise
 
         Returns:
             Generated unified diff as a string
@@ -304,61 +836,44 @@ Generate a corrected unified diff patch:"""
             Exception: If LLM call fails
         """
         # Construct the prompt for the LLM
-        prompt = self.build_prompt(test_failure, repo_path)
+        prompt = self.build_prompt(test_failure, repo_path, file_content)
 
-        # Determine backend and call appropriate method
-        if self.model_path.startswith("ollama:"):
+        # Dispatch to the backend resolved at construction time
+        if self._backend == "ollama":
             return self._call_ollama(prompt)
-        elif self.model_path.startswith("llama-cpp:"):
-            return self._call_llama_cpp(prompt)
-        else:
-            # Default to llama-cpp for file paths
-            return self._call_llama_cpp(prompt)
-
-    def build_prompt(self, test_failure: TestFailure, repo_path: Path) -> str:
+        return self._call_llama_cpp(prompt)
+
+    def build_prompt(
+        self,
+        test_failure: TestFailure,
+        repo_path: Path,
+        file_content: Optional[str] = None,
+    ) -> str:
         """Build a prompt for the LLM to generate a patch.
 
         Args:
             test_failure: The test failure information
             repo_path: Path to the repository
+            file_content: Source of the failing file if the caller already
+                read it; read from disk otherwise
 
         Returns:
             Formatted prompt string
         """
         # Try to get file content for context
-        file_context = ""
-        file_path = repo_path / test_failure.file_path
-        try:
-            file_content = file_path.read_text(encoding="utf-8")
-            file_context = f"""
-
-File Content ({test_failure.file_path}):
-```python
-{file_content}
-```
-"""
-        except (FileNotFoundError, UnicodeDecodeError):
-            file_context = f"""
-
-Note: File content not available for {test_failure.file_path}
-"""
-
-        return f"""
-You are a code fixing assistant. Generate a unified diff patch to fix the failing test.
-
-Test Information:
-- Test name: {test_failure.test_name}
-- File: {test_failure.file_path}
-- Error: {test_failure.error_output}
-{file_context}
-Please generate a unified diff patch that will fix this test failure.
-The patch should:
-1. Be in standard unified diff format
-2. Only change what's necessary to fix the test
-3. Maintain code style and functionality
-
-Generate only the diff, no explanations:
-"""
+        if file_content is None:
+            file_path = repo_path / test_failure.file_path
+            try:
+                file_content = file_path.read_text(encoding="utf-8")
+            except (FileNotFoundError, UnicodeDecodeError):
+                file_content = None
+
+        return format_patch_prompt(
+            test_name=test_failure.test_name,
+            file_path=test_failure.file_path,
+            error_output=_truncate_error_output(test_failure.error_output),
+            file_content=file_content,
+        )
 
     def _call_ollama(self, prompt: str) -> str:
         """Call Ollama backend to generate patch.
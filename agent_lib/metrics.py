@@ -26,13 +26,14 @@ Typical usage:
 
 import functools
 import json
+import logging
 import time
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 
-@dataclass
+@dataclass(slots=True)
 class PatchMetrics:
     """Metrics for a single patch generation attempt."""
 
@@ -84,50 +85,45 @@ class DevAgentMetrics:
                 "backends": {},
             }
 
-        # Overall statistics
-        success_rate = self.successful_patches / total_tests if total_tests > 0 else 0.0
-        avg_iterations = self.total_iterations / total_tests if total_tests > 0 else 0.0
-        total_duration = sum(result.duration_ms for result in self.patch_results)
-        avg_duration = total_duration / total_tests if total_tests > 0 else 0.0
-
-        # Backend-specific statistics
+        # Accumulate overall and backend-specific totals in a single pass
+        successful_patches = 0
+        total_iterations = 0
+        total_duration = 0
         backends: Dict[str, Dict[str, Any]] = {}
         for result in self.patch_results:
-            backend = result.llm_backend
-            if backend not in backends:
-                backends[backend] = {
+            stats = backends.get(result.llm_backend)
+            if stats is None:
+                stats = backends[result.llm_backend] = {
                     "tests": 0,
                     "success": 0,
                     "iterations": 0,
                     "duration_ms": 0,
                 }
 
-            backends[backend]["tests"] += 1
-            backends[backend]["iterations"] += result.iterations
-            backends[backend]["duration_ms"] += result.duration_ms
+            stats["tests"] += 1
+            stats["iterations"] += result.iterations
+            stats["duration_ms"] += result.duration_ms
+            total_iterations += result.iterations
+            total_duration += result.duration_ms
             if result.success:
-                backends[backend]["success"] += 1
+                stats["success"] += 1
+                successful_patches += 1
 
         # Calculate averages for each backend
-        for backend, stats in backends.items():
+        for stats in backends.values():
             tests = stats["tests"]
-            if tests > 0:
-                stats["success_rate"] = stats["success"] / tests
-                stats["avg_iterations"] = stats["iterations"] / tests
-                stats["avg_duration_ms"] = stats["duration_ms"] / tests
-            else:
-                stats["success_rate"] = 0.0
-                stats["avg_iterations"] = 0.0
-                stats["avg_duration_ms"] = 0.0
+            stats["success_rate"] = stats["success"] / tests
+            stats["avg_iterations"] = stats["iterations"] / tests
+            stats["avg_duration_ms"] = stats["duration_ms"] / tests
 
         return {
             "total_tests": total_tests,
-            "successful_patches": self.successful_patches,
-            "failed_patches": self.failed_patches,
-            "success_rate": success_rate,
-            "total_iterations": self.total_iterations,
-            "avg_iterations_per_test": avg_iterations,
-            "avg_duration_ms": avg_duration,
+            "successful_patches": successful_patches,
+            "failed_patches": total_tests - successful_patches,
+            "success_rate": successful_patches / total_tests,
+            "total_iterations": total_iterations,
+            "avg_iterations_per_test": total_iterations / total_tests,
+            "avg_duration_ms": total_duration / total_tests,
             "backends": backends,
         }
 
@@ -138,17 +134,58 @@ class MetricsStorage:
     def __init__(self, metrics_file: Optional[Path] = None) -> None:
         """Initialize metrics storage with an optional file path.
 
+        Metrics are stored as JSON Lines, one patch result per line, so that
+        recording a result is a single append rather than a full rewrite.
+        Metrics in the older single-document JSON format are converted on
+        first use.
+
         Args:
-            metrics_file: Path to metrics JSON file. If None, uses default location.
+            metrics_file: Path to metrics JSONL file. If None, uses default location.
         """
         if metrics_file is None:
             # Default location in user's home directory
             home_dir = Path.home()
             metrics_dir = home_dir / ".dev-agent"
             metrics_dir.mkdir(exist_ok=True)
-            self.metrics_file = metrics_dir / "metrics.json"
+            self.metrics_file = metrics_dir / "metrics.jsonl"
+            self._parent_ready = True
+            # Default location of metrics written by older versions
+            legacy_file = metrics_dir / "metrics.json"
         else:
             self.metrics_file = metrics_file
+            self._parent_ready = False
+            legacy_file = metrics_file
+        # Checked for metrics in the old format on first use, then cleared
+        self._legacy_file: Optional[Path] = legacy_file
+
+    def _ensure_parent_dir(self) -> None:
+        """Create the metrics file's directory once per storage instance."""
+        if not self._parent_ready:
+            self.metrics_file.parent.mkdir(exist_ok=True, parents=True)
+            self._parent_ready = True
+
+    def _convert_legacy_file(self) -> None:
+        """Convert metrics stored in the old JSON format to JSON Lines, once.
+
+        A default ~/.dev-agent/metrics.json is left in place and copied into
+        the new log if that does not exist yet; a metrics file given
+        explicitly is rewritten in place.
+        """
+        legacy_file, self._legacy_file = self._legacy_file, None
+        if legacy_file is None:
+            return
+        if legacy_file != self.metrics_file and self.metrics_file.exists():
+            return
+
+        legacy_metrics = _read_legacy_metrics(legacy_file)
+        if legacy_metrics is not None:
+            self.save_metrics(legacy_metrics)
+            logging.info(
+                "Converted %d metrics records from %s to JSON Lines in %s",
+                len(legacy_metrics.patch_results),
+                legacy_file,
+                self.metrics_file,
+            )
 
     def save_metrics(self, metrics: DevAgentMetrics) -> None:
         """Save metrics to storage.
@@ -156,40 +193,83 @@ class MetricsStorage:
         Args:
             metrics: DevAgentMetrics object to save
         """
-        # Convert metrics to serializable format
-        metrics_dict = {
-            "patch_results": [asdict(result) for result in metrics.patch_results]
-        }
+        self._ensure_parent_dir()
+
+        # Serialize without indentation so the C encoder is used
+        lines = [json.dumps(asdict(result)) + "\n" for result in metrics.patch_results]
+        self.metrics_file.write_text("".join(lines), encoding="utf-8")
+
+    def append_patch_result(self, result: PatchMetrics) -> None:
+        """Append a single patch result to storage.
 
-        # Create directory if it doesn't exist
-        self.metrics_file.parent.mkdir(exist_ok=True, parents=True)
+        Args:
+            result: PatchMetrics object to record
+        """
+        self._convert_legacy_file()
+        self._ensure_parent_dir()
 
-        # Write to file
-        with open(self.metrics_file, "w") as f:
-            json.dump(metrics_dict, f, indent=2)
+        with open(self.metrics_file, "ab") as f:
+            f.write(json.dumps(asdict(result)).encode("utf-8") + b"\n")
 
     def load_metrics(self) -> DevAgentMetrics:
         """Load metrics from storage.
 
         Returns:
             DevAgentMetrics object loaded from storage,
-            or a new empty DevAgentMetrics if file doesn't exist
+            or a new empty DevAgentMetrics if file doesn't exist. Corrupt
+            records are skipped.
         """
+        self._convert_legacy_file()
+        metrics = DevAgentMetrics()
         if not self.metrics_file.exists():
-            return DevAgentMetrics()
+            return metrics
 
-        try:
-            with open(self.metrics_file, "r") as f:
-                data = json.load(f)
+        with open(self.metrics_file, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    metrics.add_patch_result(PatchMetrics(**json.loads(line)))
+                except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+                    # Skip corrupt records, e.g. a partially written last line
+                    continue
 
-            metrics = DevAgentMetrics()
-            for result_dict in data.get("patch_results", []):
-                metrics.add_patch_result(PatchMetrics(**result_dict))
+        return metrics
 
-            return metrics
-        except (json.JSONDecodeError, KeyError):
-            # Return empty metrics if file is corrupt
-            return DevAgentMetrics()
+
+def _read_legacy_metrics(metrics_file: Path) -> Optional[DevAgentMetrics]:
+    """Read metrics stored as a single {"patch_results": [...]} JSON document.
+
+    Args:
+        metrics_file: Path of the file to read
+
+    Returns:
+        The stored metrics, or None if the file is missing, unreadable or
+        not in the old format
+    """
+    try:
+        with open(metrics_file, "rb") as f:
+            first_line = f.readline()
+            try:
+                record = json.loads(first_line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                record = None
+            if isinstance(record, dict) and "patch_results" not in record:
+                # Already a JSON Lines record; don't read the rest of the log
+                return None
+            data = json.loads(first_line + f.read())
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("patch_results"), list):
+        return None
+
+    metrics = DevAgentMetrics()
+    for result_dict in data["patch_results"]:
+        try:
+            metrics.add_patch_result(PatchMetrics(**result_dict))
+        except TypeError:
+            continue
+    return metrics
 
 
 # Type variable for the decorated function's return type
@@ -210,8 +290,13 @@ def record_metrics(
     """
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # Created on first call and reused, so repeated calls skip resolving
+        # the default path and creating its directory
+        storage: Optional[MetricsStorage] = None
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
+            nonlocal storage
             # Extract test name more robustly
             # Priority: explicit test_name kwarg > first positional arg > unknown
             test_name = "unknown"
@@ -224,9 +309,8 @@ def record_metrics(
                 # Fallback to first positional argument
                 test_name = str(args[0])
 
-            # Load existing metrics
-            storage = MetricsStorage()
-            metrics = storage.load_metrics()
+            if storage is None:
+                storage = MetricsStorage()
 
             # Record start time
             start_time = time.time()
@@ -246,7 +330,7 @@ def record_metrics(
             end_time = time.time()
             duration_ms = int((end_time - start_time) * 1000)
 
-            # Create and add patch metrics
+            # Create and record patch metrics
             patch_metrics = PatchMetrics(
                 test_name=str(test_name),
                 llm_backend=llm_backend,
@@ -255,10 +339,8 @@ def record_metrics(
                 success=success,
                 duration_ms=duration_ms,
             )
-            metrics.add_patch_result(patch_metrics)
-
-            # Save updated metrics
-            storage.save_metrics(metrics)
+            # Append to the log instead of rewriting the whole history
+            storage.append_patch_result(patch_metrics)
 
             # Return the original result
             return result
@@ -305,15 +387,14 @@ def generate_metrics_report(metrics: DevAgentMetrics) -> str:
         backend_success_rate = (
             stats["success_rate"] * 100 if "success_rate" in stats else 0.0
         )
-        report.extend(
-            [
-                f"  {backend}:",
-                f"    Tests: {stats['tests']}",
-                f"    Success Rate: {backend_success_rate:.1f}%",
-                f"    Average Iterations: {stats['avg_iterations']:.1f}",
-                f"    Average Duration: {stats['avg_duration_ms']:.1f}ms",
-                "",
-            ]
+        # One pre-joined block per backend; the trailing newline leaves the
+        # blank line that separates backends once the report is joined
+        report.append(
+            f"  {backend}:\n"
+            f"    Tests: {stats['tests']}\n"
+            f"    Success Rate: {backend_success_rate:.1f}%\n"
+            f"    Average Iterations: {stats['avg_iterations']:.1f}\n"
+            f"    Average Duration: {stats['avg_duration_ms']:.1f}ms\n"
         )
 
     report.append("=================================================")
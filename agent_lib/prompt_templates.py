@@ -8,6 +8,42 @@ Templates support variable substitution and are optimized for code generation
 tasks with local LLMs.
 """
 
+import string
+from typing import Optional, Tuple
+
+# Default patch prompt template used by LLMPatchGenerator.build_prompt
+PATCH_PROMPT_TEMPLATE = """
+You are a code fixing assistant. Generate a unified diff patch to fix the failing test.
+
+Test Information:
+- Test name: {test_name}
+- File: {file_path}
+- Error: {error_output}
+{file_context}
+Please generate a unified diff patch that will fix this test failure.
+The patch should:
+1. Be in standard unified diff format
+2. Only change what's necessary to fix the test
+3. Maintain code style and functionality
+
+Generate only the diff, no explanations:
+"""
+
+# File context section of the patch prompt
+FILE_CONTEXT_TEMPLATE = """
+
+File Content ({file_path}):
+```python
+{file_content}
+```
+"""
+
+# File context section when the file could not be read
+MISSING_FILE_CONTEXT_TEMPLATE = """
+
+Note: File content not available for {file_path}
+"""
+
 # Discovery error prompt template
 DISCOVERY_ERROR_TEMPLATE = """Pytest failed during discovery with this error:
 {error_excerpt}
@@ -80,12 +116,62 @@ Previous patch that failed checks:
 
 Generate a corrected unified diff patch:"""
 
+# A template pre-split into (literal text, following field name) pairs
+_CompiledTemplate = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile_template(template: str) -> _CompiledTemplate:
+    """Split a template into its literal chunks and field names once."""
+    return tuple(
+        (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _render(compiled: _CompiledTemplate, **values: str) -> str:
+    """Render a compiled template; same result as str.format for plain fields."""
+    return "".join(
+        [
+            literal if field is None else literal + values[field]
+            for literal, field in compiled
+        ]
+    )
+
+
+# Templates compiled at import so formatting skips re-parsing them per call
+_PATCH_PROMPT = _compile_template(PATCH_PROMPT_TEMPLATE)
+_FILE_CONTEXT = _compile_template(FILE_CONTEXT_TEMPLATE)
+_MISSING_FILE_CONTEXT = _compile_template(MISSING_FILE_CONTEXT_TEMPLATE)
+_DISCOVERY_ERROR = _compile_template(DISCOVERY_ERROR_TEMPLATE)
+_TEST_FAILURE = _compile_template(TEST_FAILURE_TEMPLATE)
+_SYNTAX_ERROR_RETRY = _compile_template(SYNTAX_ERROR_RETRY_TEMPLATE)
+_FORMAT_LINT_RETRY = _compile_template(FORMAT_LINT_RETRY_TEMPLATE)
+
+
+def format_patch_prompt(
+    test_name: str, file_path: str, error_output: str, file_content: Optional[str]
+) -> str:
+    """Format the default patch prompt, with file content when available."""
+    if file_content is None:
+        file_context = _render(_MISSING_FILE_CONTEXT, file_path=file_path)
+    else:
+        file_context = _render(
+            _FILE_CONTEXT, file_path=file_path, file_content=file_content
+        )
+    return _render(
+        _PATCH_PROMPT,
+        test_name=test_name,
+        file_path=file_path,
+        error_output=error_output,
+        file_context=file_context,
+    )
+
 
 def format_discovery_error_prompt(
     error_excerpt: str, file_path: str, full_context: str, patch_history: str = ""
 ) -> str:
     """Format a discovery error prompt with the given parameters."""
-    return DISCOVERY_ERROR_TEMPLATE.format(
+    return _render(
+        _DISCOVERY_ERROR,
         error_excerpt=error_excerpt,
         file_path=file_path,
         full_context=full_context,
@@ -101,7 +187,8 @@ def format_test_failure_prompt(
     patch_history: str = "",
 ) -> str:
     """Format a test failure prompt with the given parameters."""
-    return TEST_FAILURE_TEMPLATE.format(
+    return _render(
+        _TEST_FAILURE,
         test_name=test_name,
         file_path=file_path,
         error_output=error_output,
@@ -112,8 +199,10 @@ def format_test_failure_prompt(
 
 def format_syntax_error_retry_prompt(original_prompt: str, previous_patch: str) -> str:
     """Format a retry prompt for syntax errors."""
-    return SYNTAX_ERROR_RETRY_TEMPLATE.format(
-        original_prompt=original_prompt, previous_patch=previous_patch
+    return _render(
+        _SYNTAX_ERROR_RETRY,
+        original_prompt=original_prompt,
+        previous_patch=previous_patch,
     )
 
 
@@ -121,7 +210,8 @@ def format_format_lint_retry_prompt(
     original_prompt: str, format_lint_errors: str, previous_patch: str
 ) -> str:
     """Format a retry prompt for format/lint errors."""
-    return FORMAT_LINT_RETRY_TEMPLATE.format(
+    return _render(
+        _FORMAT_LINT_RETRY,
         original_prompt=original_prompt,
         format_lint_errors=format_lint_errors,
         previous_patch=previous_patch,
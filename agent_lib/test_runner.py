@@ -19,20 +19,85 @@ Typical usage:
             print(f"Failed: {failure.test_name} in {failure.file_path}")
 """
 
-import py_compile
+import functools
+import hashlib
+import os
 import re
 import shlex
 import subprocess
+import tempfile
+import traceback
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
 
 # Constants for magic numbers and configuration
 DEFAULT_TIMEOUT_SECONDS = 30
+PYTEST_USAGE_ERROR_EXIT_CODE = 4
 PYTEST_NO_TESTS_EXIT_CODE = 5
-
-
-@dataclass
+# Longest error output kept per failure; longer sections are truncated
+MAX_ERROR_BYTES = 8192
+# Directories fast_syntax_precheck never descends into: VCS metadata,
+# virtualenvs and caches rather than project sources
+SKIP_DIRS = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        "__pycache__",
+        "node_modules",
+        ".tox",
+        ".mypy_cache",
+        ".pytest_cache",
+        "site-packages",
+    }
+)
+# Build output is only skipped at the repository root; deeper directories
+# with these names may be source packages
+ROOT_SKIP_DIRS = SKIP_DIRS | {"build", "dist"}
+
+# Patterns for pytest discovery errors, compiled once at import
+_SYNTAX_ERROR_RE = re.compile(r"(\S+\.py):(\d+): SyntaxError: (.+)")
+_IMPORT_ERROR_RE = re.compile(r"ImportError while importing test module '([^']+)'")
+_MODULE_ERROR_RE = re.compile(r"(ModuleNotFoundError|ImportError): (.+)")
+
+# "FAILED <file>::<test> - <reason>" summary lines, matched at each line
+# found to start with "FAILED ". Parametrized ids may contain spaces and
+# " - ", so a bracketed suffix runs to the last "]" before the reason
+_FAILED_RE = re.compile(
+    r"FAILED [ \t]*(\S*?)::([^\s\[]*(?:\[[^\n]*?\])?)(?= - |[ \t]*$)",
+    re.MULTILINE,
+)
+
+# (mtime_ns, size) of files that last passed fast_syntax_precheck, by path
+_SYNTAX_CACHE: Dict[str, Tuple[int, int]] = {}
+
+# Below this many files to compile, worker process start-up costs more than
+# it saves
+_PARALLEL_PRECHECK_MIN_FILES = 64
+
+# Parsed failures of recent large outputs, by digest of the output, so an
+# agent loop that keeps seeing the same failing run skips re-parsing it
+_PARSE_CACHE: "OrderedDict[bytes, Tuple[TestFailure, ...]]" = OrderedDict()
+_PARSE_CACHE_SIZE = 64
+# Outputs shorter than this are parsed about as fast as they are hashed
+_PARSE_CACHE_MIN_CHARS = 16 * 1024
+
+
+@dataclass(slots=True, frozen=True)
 class TestFailure:
     """Represents a single test failure with context information."""
 
@@ -41,20 +106,53 @@ class TestFailure:
     error_output: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TestResult:
     """Represents the result of running tests in a project."""
 
     passed: bool
     failures: List[TestFailure]
     raw_output: str
+    # Exit code of the test command, or None if it did not run to completion
+    exit_code: Optional[int] = None
+
+
+@functools.lru_cache(maxsize=32)
+def _split_command(command: str) -> Tuple[str, ...]:
+    """Tokenize and prepare a command string once.
+
+    Callers usually repeat the same command every iteration, so both the
+    shlex parsing and the pytest rewrite are cached.
+    """
+    return _prepare_command(tuple(shlex.split(command)))
 
 
-def run_tests(command: str, repo_path: Path) -> TestResult:
+def _prepare_command(tokens: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Rewrite a bare pytest command to run verbosely through the interpreter.
+
+    Args:
+        tokens: The command's tokens
+
+    Returns:
+        The tokens to execute
+    """
+    if not tokens or tokens[0] != "pytest":
+        return tokens
+
+    # Replace "pytest" with "python -m pytest" for reliability
+    prepared = ("python", "-m", "pytest") + tokens[1:]
+    # Add verbose output if not already present to capture test names
+    if "-v" not in prepared and "--verbose" not in prepared:
+        prepared += ("-v",)
+    return prepared
+
+
+def run_tests(command: Union[str, List[str]], repo_path: Path) -> TestResult:
     """Run tests in the specified repository using the given command.
 
     Args:
-        command: The test command to execute (e.g., "pytest --maxfail=1")
+        command: The test command to execute (e.g., "pytest --maxfail=1"),
+            either as a shell-style string or as a list of tokens
         repo_path: Path to the repository where tests should be run
     Returns:
         TestResult containing pass/fail status, failures list, and raw output
@@ -82,50 +180,55 @@ def run_tests(command: str, repo_path: Path) -> TestResult:
 
     # For cross-platform compatibility, detect if pytest is available
     # and use appropriate command format
-    # Tokenize the command using shlex for robust parsing
+    # Tokenize the command using shlex for robust parsing, unless the caller
+    # already passed the tokens
 
-    command_tokens = shlex.split(command)
-
-    if command_tokens and command_tokens[0] == "pytest":
-        # Replace "pytest" with "python -m pytest" for reliability
-        command_tokens = ["python", "-m", "pytest"] + command_tokens[1:]
-        # Add verbose output if not already present to capture test names
-        if "-v" not in command_tokens and "--verbose" not in command_tokens:
-            command_tokens.append("-v")
+    if isinstance(command, str):
+        command_tokens = list(_split_command(command))
+    else:
+        command_tokens = list(_prepare_command(tuple(command)))
 
     try:
-        proc = subprocess.run(
-            command_tokens,
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=DEFAULT_TIMEOUT_SECONDS,  # Prevent hanging tests
-        )
+        # The child writes straight into a temporary file, with stderr merged
+        # into stdout, so Python never pumps a pipe while the tests run. The
+        # bytes are read back once and decoded explicitly, rather than through
+        # the locale codec and newline translation of text mode
+        with tempfile.TemporaryFile() as output_file:
+            proc = subprocess.run(
+                command_tokens,
+                cwd=repo_path,
+                stdout=output_file,
+                stderr=subprocess.STDOUT,
+                timeout=DEFAULT_TIMEOUT_SECONDS,  # Prevent hanging tests
+            )
+            output_file.seek(0)
+            output = _decode_output(output_file.read())
 
     except (subprocess.TimeoutExpired, FileNotFoundError) as e:
         # Handle command not found or timeout
+        display_command = command if isinstance(command, str) else shlex.join(command)
         return TestResult(
             passed=False,
             failures=[],
-            raw_output=f"Error running command '{command}': {str(e)}",
+            raw_output=f"Error running command '{display_command}': {str(e)}",
         )
 
-    output = proc.stdout + proc.stderr
-
     # If command succeeded (exit code 0), tests passed
 
     if proc.returncode == 0:
         return TestResult(
-            passed=True, failures=[], raw_output=output
+            passed=True, failures=[], raw_output=output, exit_code=0
         )  # pytest exit code 5 means "no tests were collected"
 
     # This should be treated as success for our purposes
 
     if proc.returncode == PYTEST_NO_TESTS_EXIT_CODE:
-        return TestResult(passed=True, failures=[], raw_output=output)
+        return TestResult(
+            passed=True, failures=[], raw_output=output, exit_code=proc.returncode
+        )
 
     # Check for discovery errors like syntax or import errors
-    discovery_error = check_for_discovery_errors(proc.stdout, proc.stderr)
+    discovery_error = check_for_discovery_errors(output, "")
     if discovery_error:
         return TestResult(
             passed=False,
@@ -137,12 +240,32 @@ def run_tests(command: str, repo_path: Path) -> TestResult:
                 )
             ],
             raw_output=output,
+            exit_code=proc.returncode,
         )
 
     # Parse failures from pytest output
     failures = _parse_pytest_failures(output)
 
-    return TestResult(passed=False, failures=failures, raw_output=output)
+    return TestResult(
+        passed=False, failures=failures, raw_output=output, exit_code=proc.returncode
+    )
+
+
+def _decode_output(data: bytes) -> str:
+    """Decode captured process output as UTF-8.
+
+    Undecodable bytes are replaced rather than raising, and Windows line
+    endings are normalized as text mode would.
+
+    Args:
+        data: Raw bytes captured from the process
+
+    Returns:
+        The decoded output
+    """
+    if b"\r\n" in data:
+        data = data.replace(b"\r\n", b"\n")
+    return data.decode("utf-8", "replace")
 
 
 def check_for_discovery_errors(stdout: str, stderr: str) -> Optional[Dict[str, Any]]:
@@ -156,11 +279,10 @@ def check_for_discovery_errors(stdout: str, stderr: str) -> Optional[Dict[str, A
         Dict with discovery error info if found, None otherwise.
         Dict contains: status, file_path, error
     """
-    combined_output = stdout + stderr
-
     # Check for syntax errors
-    syntax_error_pattern = r"(\S+\.py):(\d+): SyntaxError: (.+)"
-    syntax_match = re.search(syntax_error_pattern, combined_output)
+    syntax_match = _search_marked_lines(
+        _SYNTAX_ERROR_RE, ": SyntaxError: ", stdout, stderr
+    )
     if syntax_match:
         file_path, line_num, error_msg = syntax_match.groups()
         return {
@@ -170,13 +292,13 @@ def check_for_discovery_errors(stdout: str, stderr: str) -> Optional[Dict[str, A
         }
 
     # Check for import errors
-    import_error_pattern = r"ImportError while importing test module '([^']+)'"
-    import_match = re.search(import_error_pattern, combined_output)
+    import_match = _search_marked_lines(
+        _IMPORT_ERROR_RE, "ImportError while importing test module", stdout, stderr
+    )
     if import_match:
         file_path = import_match.group(1)
         # Extract the actual import error details
-        module_error_pattern = r"(ModuleNotFoundError|ImportError): (.+)"
-        module_match = re.search(module_error_pattern, combined_output)
+        module_match = _search_marked_lines(_MODULE_ERROR_RE, "Error: ", stdout, stderr)
         if module_match:
             error_type, error_msg = module_match.groups()
             return {
@@ -194,105 +316,269 @@ def check_for_discovery_errors(stdout: str, stderr: str) -> Optional[Dict[str, A
     return None
 
 
+def _search_marked_lines(
+    pattern: Pattern[str], marker: str, *texts: str
+) -> Optional[Match[str]]:
+    """Search only the lines that contain a literal marker for a pattern.
+
+    The discovery-error patterns never span lines, so a cheap substring scan
+    for the marker finds every candidate line and the regex runs only there.
+
+    Args:
+        pattern: Compiled pattern to search for
+        marker: Literal text every match's line must contain
+        texts: Outputs to search, in order
+
+    Returns:
+        The first match, or None if no line matches
+    """
+    for text in texts:
+        start = text.find(marker)
+        while start != -1:
+            line_start = text.rfind("\n", 0, start) + 1
+            line_end = text.find("\n", start)
+            if line_end == -1:
+                line_end = len(text)
+            match = pattern.search(text, line_start, line_end)
+            if match:
+                return match
+            start = text.find(marker, line_end)
+    return None
+
+
 def fast_syntax_precheck(repo_path: Path) -> Optional[Dict[str, Any]]:
     """Perform fast syntax-only pre-check on all Python files.
 
+    Virtualenvs, caches and other SKIP_DIRS, and build output at the root,
+    are not searched. Unreadable directories are skipped. Files that
+    passed on an earlier call and whose modification time and size
+    are unchanged since are not compiled again. Large batches of files are
+    compiled across worker processes; the first error in walk order is still
+    the one reported.
+
     Args:
         repo_path: Path to the repository to check
 
     Returns:
         Dict with discovery error info if syntax error found, None otherwise
     """
-    for py_file in repo_path.rglob("*.py"):
-        try:
-            py_compile.compile(str(py_file), doraise=True)
-        except py_compile.PyCompileError as e:
+    pending: List[Tuple[Path, str, Tuple[int, int]]] = []
+    for py_file in _iter_python_files(repo_path):
+        cache_key = str(py_file.absolute())
+        stat = py_file.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if _SYNTAX_CACHE.get(cache_key) != signature:
+            pending.append((py_file, cache_key, signature))
+
+    paths = [str(py_file) for py_file, _, _ in pending]
+    if len(pending) < _PARALLEL_PRECHECK_MIN_FILES or (os.cpu_count() or 1) < 2:
+        return _record_precheck_results(repo_path, pending, map(_compile_error, paths))
+
+    # Imported only when needed, as it adds noticeably to start-up time
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor()
+    try:
+        errors = executor.map(_compile_error, paths, chunksize=32)
+        return _record_precheck_results(repo_path, pending, errors)
+    finally:
+        # Don't start compiling files past the first error
+        executor.shutdown(cancel_futures=True)
+
+
+def _iter_python_files(
+    root: Path, skip_dirs: AbstractSet[str] = ROOT_SKIP_DIRS
+) -> Iterator[Path]:
+    """Yield the Python files under root, pruning skipped directories.
+
+    Args:
+        root: Directory to walk
+        skip_dirs: Names of root's subdirectories not to descend into; their
+            own subdirectories are pruned by SKIP_DIRS
+
+    Yields:
+        Path of each .py file, without following directory symlinks
+    """
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        yield from _iter_python_files(Path(entry.path), SKIP_DIRS)
+                elif entry.name.endswith(".py"):
+                    yield Path(entry.path)
+    except OSError:
+        # Skip directories that cannot be listed, as Path.rglob does
+        return
+
+
+def _compile_error(path: str) -> Optional[str]:
+    """Compile a Python file in memory and return its syntax error, if any.
+
+    Args:
+        path: Path of the file to compile
+
+    Returns:
+        The formatted syntax error, or None if the file compiles
+    """
+    try:
+        # Compile in memory; py_compile would write a .pyc for every file
+        with open(path, "rb") as f:
+            compile(f.read(), path, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return "".join(traceback.format_exception_only(type(e), e))
+    return None
+
+
+def _record_precheck_results(
+    repo_path: Path,
+    pending: List[Tuple[Path, str, Tuple[int, int]]],
+    errors: Iterable[Optional[str]],
+) -> Optional[Dict[str, Any]]:
+    """Update the syntax cache with compile results, stopping at an error.
+
+    Args:
+        repo_path: Path to the repository being checked
+        pending: (file, cache key, signature) for each file that was compiled
+        errors: Compile error for each pending file, in the same order
+
+    Returns:
+        Dict with discovery error info for the first error, None otherwise
+    """
+    for (py_file, cache_key, signature), error in zip(pending, errors):
+        if error is not None:
+            _SYNTAX_CACHE.pop(cache_key, None)
             return {
                 "status": "discovery_error",
                 "file_path": str(py_file.relative_to(repo_path)),
-                "error": str(e),
+                "error": error,
             }
+        _SYNTAX_CACHE[cache_key] = signature
     return None
 
 
-def _extract_error_message(output: str, test_nodeid: str) -> str:
-    """Extract relevant error message for a specific test failure.
+def _extract_error_message(output: str, start: int, next_start: int) -> str:
+    """Extract the error message for the failure reported at output[start].
 
     Args:
         output: Full pytest output
-        test_nodeid: Test identifier (e.g., "test_file.py::test_name")
+        start: Offset of the "FAILED <nodeid>" line for the failure
+        next_start: Offset of the next "FAILED " line, or len(output)
 
     Returns:
-        Extracted error message or full output if extraction fails
+        The extracted error message
     """
+    # The section runs until the next failure or an earlier "=" separator
+    line_end = output.find("\n", start, next_start)
+    separator = output.find("\n=", line_end, next_start) if line_end != -1 else -1
+    end = separator if separator != -1 else next_start
 
-    lines = output.splitlines()
+    return _cap_error_output(output[start:end].strip())
 
-    # Find the failure section for this specific test
-    in_failure_section = False
-    error_lines: List[str] = []
 
-    for line in lines:
-        if f"FAILED {test_nodeid}" in line:
-            in_failure_section = True
-            error_lines.append(line)
+def _cap_error_output(message: str) -> str:
+    """Truncate an error message to at most MAX_ERROR_BYTES characters.
 
-        elif in_failure_section:
-            if line.startswith("FAILED ") or line.startswith("="):
-                # We've reached the next failure or end section
-                break
-
-            error_lines.append(line)
-
-    if error_lines:
-        return "\n".join(error_lines).strip()
+    Args:
+        message: Error message taken from the pytest output
 
-    # Fallback to full output if we can't extract specific error
-    return output
+    Returns:
+        The message, or its head with a truncation marker if it was too long
+    """
+    if len(message) <= MAX_ERROR_BYTES:
+        return message
+    return message[:MAX_ERROR_BYTES] + "\n…[truncated]"
 
 
 def _parse_pytest_failures(output: str) -> List[TestFailure]:
     """Parse pytest output to extract test failure information.
 
+    Results for large outputs are cached by a digest of the output, so
+    parsing the same output again is a dictionary lookup.
+
     Args:
         output: Raw pytest output containing failure information
 
     Returns:
         List of TestFailure objects with parsed failure details
     """
+    if len(output) < _PARSE_CACHE_MIN_CHARS:
+        return _parse_failures(output)
 
-    failures: List[TestFailure] = []
+    digest = hashlib.blake2b(
+        output.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    cached = _PARSE_CACHE.get(digest)
+    if cached is None:
+        cached = _PARSE_CACHE[digest] = tuple(_parse_failures(output))
+        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    else:
+        _PARSE_CACHE.move_to_end(digest)
+
+    # TestFailure is immutable, so callers can share the cached instances
+    return list(cached)
+
+
+def _failed_line_starts(output: str) -> Iterator[int]:
+    """Yield the offset of every line of output that starts with "FAILED ".
 
-    lines = output.splitlines()
+    Args:
+        output: Raw pytest output
 
-    for line in lines:
-        # Look for "FAILED test_file.py::test_name" pattern
+    Yields:
+        Offset of the first character of each such line
+    """
+    if output.startswith("FAILED "):
+        yield 0
+    index = output.find("\nFAILED ")
+    while index != -1:
+        yield index + 1
+        index = output.find("\nFAILED ", index + 1)
 
-        if line.startswith("FAILED ") and "::" in line:
-            # Example: "FAILED test_sample.py::test_always_fails - assert 2 == 3"
 
-            parts = line.split()
+def _parse_failures(output: str) -> List[TestFailure]:
+    """Parse pytest output without consulting the cache.
 
-            if len(parts) >= 2:
-                test_nodeid = parts[1]  # e.g. "test_sample.py::test_always_fails"
+    Args:
+        output: Raw pytest output containing failure information
 
-                if "::" in test_nodeid:
-                    file_part, test_part = test_nodeid.split("::", 1)
+    Returns:
+        List of TestFailure objects with parsed failure details
+    """
 
-                    failure = TestFailure(
-                        test_name=test_part,
-                        file_path=file_part,
-                        error_output=_extract_error_message(output, test_nodeid),
-                    )
+    failures: List[TestFailure] = []
 
-                    failures.append(failure)
+    # Jump between "FAILED " lines with str.find, without splitting the output
+    # into lines, and match "FAILED test_file.py::test_name" only there. Each
+    # FAILED line also ends the previous section, so the offsets are indexed
+    # once and each failure's section is sliced out between neighbours
+    # Example: "FAILED test_sample.py::test_always_fails - assert 2 == 3"
+    starts = list(_failed_line_starts(output))
+    starts.append(len(output))
+    for line_start, next_start in zip(starts, starts[1:]):
+        match = _FAILED_RE.match(output, line_start)
+        if match is None:
+            continue
+        file_part, test_part = match.groups()
+        failures.append(
+            TestFailure(
+                test_name=test_part,
+                file_path=file_part,
+                error_output=_extract_error_message(output, line_start, next_start),
+            )
+        )
 
     # If no FAILED lines found but we have a non-zero exit code,
     # create a generic failure entry
 
     if not failures:
         failures.append(
-            TestFailure(test_name="unknown", file_path="unknown", error_output=output)
+            TestFailure(
+                test_name="unknown",
+                file_path="unknown",
+                error_output=_cap_error_output(output),
+            )
         )
 
     return failures
@@ -13,21 +13,80 @@ Usage:
 For full documentation, see: docs/PROJECT-OUTLINE.md
 """
 
+import functools
+import os
 import re
+import shlex
+import shutil
+import string
 import subprocess
 import sys
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, NoReturn, Optional, Tuple
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NoReturn,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from agent_lib.llm_patch_generator import LLMPatchGenerator
+from agent_lib.llm_patch_generator import (
+    LLMPatchGenerator,
+    PatchResult,
+    apply_diff_exactly,
+    diff_file_paths,
+    is_cosmetic_patch,
+)
 from agent_lib.metrics import (
     DevAgentMetrics,
     MetricsStorage,
     PatchMetrics,
     generate_metrics_report,
 )
-from agent_lib.test_runner import TestFailure, run_tests
+from agent_lib.test_runner import (
+    PYTEST_NO_TESTS_EXIT_CODE,
+    PYTEST_USAGE_ERROR_EXIT_CODE,
+    TestFailure,
+    run_tests,
+)
+
+# ASCII characters kept as-is in branch names; every other ASCII character
+# (":", spaces, brackets, ...) becomes "-" in a single str.translate pass
+_BRANCH_NAME_CHARS = set(string.ascii_letters + string.digits + "-_./")
+_BRANCH_NAME_TABLE = str.maketrans(
+    {chr(c): "-" for c in range(128) if chr(c) not in _BRANCH_NAME_CHARS}
+)
+_DASH_RUN_RE = re.compile(r"-{2,}")
+
+# pytest exit codes of a focused retest that selected nothing to run
+_NOTHING_SELECTED_EXIT_CODES = (PYTEST_USAGE_ERROR_EXIT_CODE, PYTEST_NO_TESTS_EXIT_CODE)
+
+# Diff header lines for changes only git apply handles: file creation and
+# deletion, renames, copies, mode changes and binary patches
+_GIT_ONLY_DIFF_LINES = (
+    "--- /dev/null",
+    "+++ /dev/null",
+    "new file mode",
+    "deleted file mode",
+    "old mode",
+    "new mode",
+    "rename ",
+    "copy ",
+    "similarity index",
+    "Binary files",
+    "GIT binary patch",
+)
+
+# flake8 report line: "<path>:<row>:<col>: <code> <message>"
+_FLAKE8_LINE_RE = re.compile(r"^(.+?):\d+:\d+: ", re.MULTILINE)
 
 
 # Custom exceptions for orchestrator error handling
@@ -59,31 +118,8 @@ class TestRunner:
     def run_tests(self, command: str) -> Dict[str, Any]:
         """Run tests and return results in dict format."""
         result = run_tests(command, self.repo_path)
-
-        # Check if this is a discovery error by examining the failure content
-        if (
-            not result.passed
-            and len(result.failures) == 1
-            and result.failures[0].test_name == result.failures[0].error_output
-        ):
-            # This indicates a discovery error (test_name == error_output)
-            return {
-                "status": "discovery_error",
-                "file_path": result.failures[0].file_path,
-                "error": result.failures[0].error_output,
-                "passed": result.passed,
-                "failures": [
-                    {
-                        "test_name": f.test_name,
-                        "file_path": f.file_path,
-                        "error_output": f.error_output,
-                    }
-                    for f in result.failures
-                ],
-                "raw_output": result.raw_output,
-            }
-
-        return {
+        failures = result.failures
+        result_dict: Dict[str, Any] = {
             "passed": result.passed,
             "failures": [
                 {
@@ -91,11 +127,25 @@ class TestRunner:
                     "file_path": f.file_path,
                     "error_output": f.error_output,
                 }
-                for f in result.failures
+                for f in failures
             ],
             "raw_output": result.raw_output,
+            "exit_code": result.exit_code,
         }
 
+        # Check if this is a discovery error by examining the failure content
+        if (
+            not result.passed
+            and len(failures) == 1
+            and failures[0].test_name == failures[0].error_output
+        ):
+            # This indicates a discovery error (test_name == error_output)
+            result_dict["status"] = "discovery_error"
+            result_dict["file_path"] = failures[0].file_path
+            result_dict["error"] = failures[0].error_output
+
+        return result_dict
+
 
 class GitTool:
     """Git operations for patch application and branch management."""
@@ -110,8 +160,8 @@ class GitTool:
             subprocess.run(
                 ["git", "checkout", "-b", branch_name],
                 check=True,
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
             return True
         except subprocess.CalledProcessError:
@@ -119,29 +169,51 @@ class GitTool:
 
     def apply_patch(self, patch_content: str) -> bool:
         """Apply a unified diff patch."""
-        try:
-            # First validate the patch can be applied
-            proc = subprocess.run(
-                ["git", "apply", "--check"],
-                input=patch_content,
-                text=True,
-                capture_output=True,
-            )
-            if proc.returncode != 0:
-                raise PatchApplicationError("Patch validation failed")
-
-            # Apply the patch
-            subprocess.run(["git", "apply"], input=patch_content, text=True, check=True)
+        # Most LLM patches are a clean edit of one existing file; those are
+        # applied in-process without spawning git at all
+        if _apply_patch_in_process(patch_content):
             return True
-        except subprocess.CalledProcessError:
-            raise PatchApplicationError("Failed to apply patch")
 
-    def commit(self, message: str) -> bool:
-        """Commit current changes."""
+        # git apply is all-or-nothing: it validates every hunk before touching
+        # the tree, so a separate --check run would only parse the patch twice.
+        # Send bytes and only decode git's stderr if it fails
+        proc = subprocess.run(
+            ["git", "apply"],
+            input=patch_content.encode("utf-8"),
+            capture_output=True,
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.decode("utf-8", "replace").strip()
+            raise PatchApplicationError(f"Failed to apply patch: {error}")
+        return True
+
+    def commit(self, message: str, files: Optional[Sequence[str]] = None) -> bool:
+        """Commit current changes.
+
+        Args:
+            message: The commit message
+            files: Paths to stage. If empty or None, every change in the
+                working tree is staged
+
+        Returns:
+            True if the commit was created, False otherwise
+        """
+        # Staging only the known paths spares git a stat of the whole tree.
+        # Only the exit status matters, so stdout is discarded rather than
+        # buffered; stderr is kept for CalledProcessError
+        pathspec = ["--", *files] if files else ["."]
         try:
-            subprocess.run(["git", "add", "."], check=True, capture_output=True)
             subprocess.run(
-                ["git", "commit", "-m", message], check=True, capture_output=True
+                ["git", "add", *pathspec],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            subprocess.run(
+                ["git", "commit", "-m", message],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
             return True
         except subprocess.CalledProcessError:
@@ -150,7 +222,12 @@ class GitTool:
     def push(self) -> bool:
         """Push current branch to remote."""
         try:
-            subprocess.run(["git", "push"], check=True, capture_output=True)
+            subprocess.run(
+                ["git", "push"],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
             return True
         except subprocess.CalledProcessError:
             return False
@@ -180,7 +257,6 @@ class GitTool:
                 ],
                 check=True,
                 capture_output=True,
-                text=True,
             )
             return True
         except Exception:
@@ -189,22 +265,49 @@ class GitTool:
             # that might occur if gh CLI is not installed or configured
             return False
 
-    def check_format_and_lint(self, file_path: str) -> Dict[str, Any]:
-        """Check format and lint compliance for a file.
+    def check_format_and_lint(
+        self, file_paths: Union[str, Sequence[str]]
+    ) -> Dict[str, Any]:
+        """Check format and lint compliance for one or more files.
+
+        All files are checked by a single black and a single flake8 run, so
+        checking every file a patch touches pays each tool's startup once.
 
         Args:
-            file_path: Path to the file to check
+            file_paths: Path, or paths, of the files to check
 
         Returns:
-            Dict with 'passed' bool and optional 'error' string
+            Dict with 'passed' bool and optional 'error' string. Lint failures
+            also carry 'lint_errors', the flake8 report lines by file path
         """
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+
         try:
-            # Check formatting with black (dry run)
-            black_result = subprocess.run(
-                ["black", "--check", "--diff", file_path],
-                capture_output=True,
-                text=True,
-            )
+            # black and flake8 are independent read-only checks, so start both
+            # at once; the combined check then takes as long as the slower one
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                # Check formatting with black (dry run)
+                black_future = executor.submit(
+                    subprocess.run,
+                    ["black", "--check", "--diff", *file_paths],
+                    capture_output=True,
+                    text=True,
+                )
+                # Check linting with flake8
+                flake8_future = executor.submit(
+                    subprocess.run,
+                    [
+                        "flake8",
+                        "--max-line-length=88",
+                        "--extend-ignore=E203",
+                        *file_paths,
+                    ],
+                    capture_output=True,
+                    text=True,
+                )
+                black_result = black_future.result()
+                flake8_result = flake8_future.result()
 
             if black_result.returncode != 0:
                 return {
@@ -212,17 +315,11 @@ class GitTool:
                     "error": f"Format check failed: {black_result.stdout}",
                 }
 
-            # Check linting with flake8
-            flake8_result = subprocess.run(
-                ["flake8", "--max-line-length=88", "--extend-ignore=E203", file_path],
-                capture_output=True,
-                text=True,
-            )
-
             if flake8_result.returncode != 0:
                 return {
                     "passed": False,
                     "error": f"Lint check failed: {flake8_result.stdout}",
+                    "lint_errors": _group_flake8_errors(flake8_result.stdout),
                 }
 
             # Both checks passed
@@ -235,6 +332,64 @@ class GitTool:
             }
 
 
+def _apply_patch_in_process(patch_content: str) -> bool:
+    """Apply a patch to a single existing file without running git.
+
+    Only diffs that apply_diff_exactly reproduces exactly are handled; file
+    creation, deletion, renames, mode changes and symlinks are left to git.
+
+    Args:
+        patch_content: The unified diff to apply
+
+    Returns:
+        True if the patch was written, False if git apply should handle it
+    """
+    paths = diff_file_paths(patch_content)
+    if len(paths) != 1 or any(
+        line.startswith(_GIT_ONLY_DIFF_LINES) for line in patch_content.splitlines()
+    ):
+        return False
+
+    path = Path(paths[0])
+    try:
+        if path.is_symlink():
+            return False
+        patched = apply_diff_exactly(path.read_text(encoding="utf-8"), patch_content)
+        if patched is None:
+            return False
+
+        # Write beside the original and swap it in, keeping its permissions
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(patched.encode("utf-8"))
+            shutil.copymode(path, temp_name)
+            os.replace(temp_name, path)
+        except OSError:
+            os.unlink(temp_name)
+            raise
+    except (OSError, UnicodeDecodeError):
+        return False
+    return True
+
+
+def _group_flake8_errors(report: str) -> Dict[str, List[str]]:
+    """Group flake8 report lines by the file they refer to.
+
+    Args:
+        report: flake8's standard output
+
+    Returns:
+        Mapping of file path to that file's report lines
+    """
+    errors: Dict[str, List[str]] = {}
+    for line in report.splitlines():
+        match = _FLAKE8_LINE_RE.match(line)
+        if match:
+            errors.setdefault(match.group(1), []).append(line)
+    return errors
+
+
 def _sanitize_branch_name(name: str) -> str:
     """Sanitize branch name to follow git naming conventions."""
     # Preserve the branch prefix structure (e.g., "dev-agent/fix")
@@ -244,17 +399,57 @@ def _sanitize_branch_name(name: str) -> str:
 
     prefix, rest = prefix_parts
 
-    # Replace colons and double colons with hyphens
-    rest = re.sub(r"::", "-", rest)
-    rest = re.sub(r":", "-", rest)
-
-    # Replace spaces with hyphens
-    rest = rest.replace(" ", "-")
+    # Replace colons, spaces and other characters git rejects with hyphens,
+    # collapsing runs so "::" becomes a single hyphen
+    rest = _DASH_RUN_RE.sub("-", rest.translate(_BRANCH_NAME_TABLE)).strip("-")
 
     # Return with original prefix structure intact
     return f"{prefix}_{rest}"
 
 
+def _focused_retest_command(test_command: str, failure: TestFailure) -> Optional[str]:
+    """Build a command that re-runs only the test the patch was meant to fix.
+
+    Args:
+        test_command: The configured test command
+        failure: The failure the patch was generated for
+
+    Returns:
+        The command narrowed to the failing test's node id; None if it is not
+        pytest or the failure names no test to select
+    """
+    tokens = test_command.split()
+    if tokens[:1] != ["pytest"] and tokens[:3] != ["python", "-m", "pytest"]:
+        return None
+    if failure.test_name in ("", "unknown", "discovery_error") or (
+        failure.file_path in ("", "unknown")
+    ):
+        # Discovery, collection or setup errors parsed without a node id
+        return None
+    node_id = f"{failure.file_path}::{failure.test_name}"
+    return f"{test_command} {shlex.quote(node_id)}"
+
+
+def _record_outcome(
+    metrics: DevAgentMetrics,
+    metrics_storage: MetricsStorage,
+    patch_metrics: PatchMetrics,
+) -> None:
+    """Record the outcome of a run, save it and print the metrics report.
+
+    The result is appended to the stored log, so earlier runs are kept.
+
+    Args:
+        metrics: Metrics collected during this run
+        metrics_storage: Storage the result is appended to
+        patch_metrics: The result of this run
+    """
+    metrics.add_patch_result(patch_metrics)
+    metrics_storage.append_patch_result(patch_metrics)
+    sys.stdout.write("\n" + generate_metrics_report(metrics) + "\n")
+
+
+@functools.lru_cache(maxsize=8)
 def _parse_model_path(model_path: str) -> Tuple[str, str]:
     """Parse model path into backend and model name.
 
@@ -275,31 +470,48 @@ def _parse_model_path(model_path: str) -> Tuple[str, str]:
         return "llama-cpp", Path(model_path).stem
 
 
-def _load_config() -> Dict[str, Any]:
+def _freeze(config: Dict[str, Any]) -> Mapping[str, Any]:
+    """Wrap a dict, and every dict nested in it, in a read-only view."""
+    return MappingProxyType(
+        {
+            key: _freeze(item) if isinstance(item, dict) else item
+            for key, item in config.items()
+        }
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> Mapping[str, Any]:
     """Load configuration for the dev-agent orchestrator.
 
+    The configuration is built once and shared, so it is returned read-only.
+
     Returns:
-        Configuration dictionary with orchestrator settings.
+        Configuration mapping with orchestrator settings.
 
     Raises:
         ConfigError: If configuration is invalid or missing.
     """
     # For now, return default configuration
     # Future versions will load from config file
-    return {
-        "max_iterations": 5,
-        "test_command": "pytest --maxfail=1",
-        "git": {
-            "branch_prefix": "dev-agent/fix",
-            "remote": "origin",
-            "auto_pr": True,
-        },
-        "llm": {"model_path": "llama-cpp:models/codellama.gguf"},
-        "metrics": {
-            "enabled": True,
-            "storage_path": None,  # Use default path
-        },
-    }
+    return _freeze(
+        {
+            "max_iterations": 5,
+            "test_command": "pytest --maxfail=1",
+            # Confirm a patch on the failing test alone before the full suite
+            "test": {"fast_confirm": True},
+            "git": {
+                "branch_prefix": "dev-agent/fix",
+                "remote": "origin",
+                "auto_pr": True,
+            },
+            "llm": {"model_path": "llama-cpp:models/codellama.gguf"},
+            "metrics": {
+                "enabled": True,
+                "storage_path": None,  # Use default path
+            },
+        }
+    )
 
 
 def main() -> NoReturn:
@@ -333,19 +545,27 @@ def main() -> NoReturn:
     test_command: str = config["test_command"]
     # Auto PR configuration
     auto_pr_enabled: bool = config["git"].get("auto_pr", False)
+    fast_confirm: bool = config.get("test", {}).get("fast_confirm", True)
 
     # Track if we have a failure object for metrics
     current_failure: Optional[TestFailure] = None
+    # Result still known to hold for the next iteration, if any
+    known_result: Optional[Dict[str, Any]] = None
+    # Last patch committed, with when and in which iteration it was generated
+    patch_result: Optional[PatchResult] = None
+    patch_start_time = start_time
+    patch_iterations = 0
 
     for iteration in range(max_iterations):
         # Start timing for this iteration
         iteration_start_time = time.time()
 
-        # Run tests
+        # Run tests, unless the last patch could not have changed the outcome
         try:
-            test_result = test_runner.run_tests(test_command)
+            test_result = known_result or test_runner.run_tests(test_command)
         except NoTestsFoundError:
             sys.exit(0)
+        known_result = None
 
         # Check for discovery errors (syntax/import errors) - treat as special case
         if test_result.get("status") == "discovery_error":
@@ -357,7 +577,11 @@ def main() -> NoReturn:
             )
             # Continue with normal patch generation process
         elif test_result["passed"]:
-            sys.exit(0)
+            if patch_result is None:
+                sys.exit(0)
+            # The last committed patch fixed the tests after all, even though
+            # its retest did not confirm it, so finish it as a fix
+            break
         elif not test_result["failures"]:
             # If no failures detected but tests didn't pass, treat as no tests found
             raise NoTestsFoundError("No test failures detected")
@@ -372,6 +596,8 @@ def main() -> NoReturn:
         patch_result = llm_generator.generate_patch(
             current_failure, Path(repo_path)
         )  # Create branch for this fix attempt
+        patch_start_time = iteration_start_time
+        patch_iterations = iteration + 1
         branch_name = _sanitize_branch_name(
             f"{config['git']['branch_prefix']}_{current_failure.test_name}"
         )
@@ -390,79 +616,96 @@ def main() -> NoReturn:
             ):
                 sys.exit(2)
 
+            # Check before applying, while the original sources are on disk
+            cosmetic = is_cosmetic_patch(patch_result.diff_content, Path(repo_path))
+
             # Apply patch
             if not git_tool.apply_patch(patch_result.diff_content):
                 sys.exit(2)  # Commit the changes
             commit_msg = f"TDD: fix {current_failure.test_name}"
-            git_tool.commit(commit_msg)
+            git_tool.commit(commit_msg, diff_file_paths(patch_result.diff_content))
+        except PatchApplicationError:
+            sys.exit(2)
 
-            # Only push if tests pass after this fix
+        # Only push if tests pass after this fix. Re-run the test that failed
+        # first; only if it passes, or selects nothing, is the full command run
+        retest_command = (
+            _focused_retest_command(test_command, current_failure)
+            if fast_confirm
+            else None
+        )
+        retest_result = test_runner.run_tests(retest_command or test_command)
+        if retest_command and (
+            retest_result["passed"]
+            or retest_result.get("exit_code") in _NOTHING_SELECTED_EXIT_CODES
+        ):
             retest_result = test_runner.run_tests(test_command)
-            if retest_result["passed"]:
-                # Record successful metrics
-                iteration_end_time = time.time()
-                duration_ms = round((iteration_end_time - iteration_start_time) * 1000)
-                patch_metrics = PatchMetrics(
-                    test_name=current_failure.test_name,
-                    llm_backend=llm_backend,
-                    model_name=model_name,
-                    iterations=iteration + 1,
-                    success=True,
-                    duration_ms=duration_ms,
-                )
-                metrics.add_patch_result(patch_metrics)
-                metrics_storage.save_metrics(metrics)
-
-                # Generate and print report
-                report = generate_metrics_report(metrics)
-                print("\n" + report)
-
-                # Push changes
-                if git_tool.push():
-                    # Create PR if enabled
-                    if auto_pr_enabled:
-                        pr_title = f"Fix {current_failure.test_name}"
-                        pr_body = (
-                            f"This PR was automatically generated by Dev Agent to "
-                            f"fix failing test: {current_failure.test_name}.\n\n"
-                            f"The fix was applied after {iteration + 1} "
-                            f"iteration(s).\n\n"
-                            f"LLM Backend: {llm_backend}\n"
-                            f"Model: {model_name}"
-                        )
-                        git_tool.open_pr(pr_title, pr_body)
+        elif retest_command and cosmetic:
+            # Only comments or formatting changed and the failing test still
+            # fails, so the earlier full result still names a real failure;
+            # reuse it instead of re-running the whole suite
+            known_result = test_result
+        if retest_result["passed"]:
+            break
+    else:
+        # If we reach here, max iterations was reached
+        # Record failure metrics
+        final_end_time = time.time()
+        total_duration_ms = round((final_end_time - start_time) * 1000)
+
+        # Make sure we have a failure object to record metrics for
+        if current_failure:
+            test_name = current_failure.test_name
+        else:
+            test_name = "unknown_failure"
+
+        patch_metrics = PatchMetrics(
+            test_name=test_name,
+            llm_backend=llm_backend,
+            model_name=model_name,
+            iterations=max_iterations,
+            success=False,
+            duration_ms=total_duration_ms,
+        )
+        _record_outcome(metrics, metrics_storage, patch_metrics)
 
-                sys.exit(0)
-        except PatchApplicationError:
-            sys.exit(2)
+        sys.exit(1)
 
-    # If we reach here, max iterations was reached
-    # Record failure metrics
-    final_end_time = time.time()
-    total_duration_ms = round((final_end_time - start_time) * 1000)
+    if patch_result is None or current_failure is None:
+        # The loop only ends early once a patch has fixed the tests
+        sys.exit(0)
 
-    # Make sure we have a failure object to record metrics for
-    if current_failure:
-        test_name = current_failure.test_name
-    else:
-        test_name = "unknown_failure"
+    # The patch fixed the failure, so it is safe to replay
+    llm_generator.cache_patch(patch_result)
 
+    # Record successful metrics
+    duration_ms = round((time.time() - patch_start_time) * 1000)
     patch_metrics = PatchMetrics(
-        test_name=test_name,
+        test_name=current_failure.test_name,
         llm_backend=llm_backend,
         model_name=model_name,
-        iterations=max_iterations,
-        success=False,
-        duration_ms=total_duration_ms,
+        iterations=patch_iterations,
+        success=True,
+        duration_ms=duration_ms,
     )
-    metrics.add_patch_result(patch_metrics)
-    metrics_storage.save_metrics(metrics)
-
-    # Generate and print failure report
-    report = generate_metrics_report(metrics)
-    print("\n" + report)
+    _record_outcome(metrics, metrics_storage, patch_metrics)
+
+    # Push changes
+    if git_tool.push():
+        # Create PR if enabled
+        if auto_pr_enabled:
+            pr_title = f"Fix {current_failure.test_name}"
+            pr_body = (
+                f"This PR was automatically generated by Dev Agent to "
+                f"fix failing test: {current_failure.test_name}.\n\n"
+                f"The fix was applied after {patch_iterations} "
+                f"iteration(s).\n\n"
+                f"LLM Backend: {llm_backend}\n"
+                f"Model: {model_name}"
+            )
+            git_tool.open_pr(pr_title, pr_body)
 
-    sys.exit(1)
+    sys.exit(0)
 
 
 if __name__ == "__main__":
@@ -11,12 +11,16 @@ Usage:
 Optional flags:
     --config <path>    Path to configuration file
     --dry-run         Show plan without executing
+    --in-process      Run dev-agent inside this process instead of a new one
 """
 
 import argparse
+import io
 import json
 import subprocess
 import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
 from typing import Any, Dict, List, Optional
 
 
@@ -32,25 +36,15 @@ class StoryParser:
         Returns:
             List of subtasks, each with a 'description' field
         """
-        if not story or not story.strip():
-            return []
-
         # Simple implementation: split on sentences for now
-        # This is intentionally basic as a stub implementation
-        sentences = [s.strip() for s in story.split(".") if s.strip()]
-
-        subtasks = []
-        for i, sentence in enumerate(sentences):
-            if sentence:
-                subtasks.append(
-                    {
-                        "id": i + 1,
-                        "description": sentence.strip() + ".",
-                        "status": "pending",
-                    }
-                )
-
-        return subtasks
+        # This is intentionally basic as a stub implementation. Each sentence
+        # is stripped once and blank ones are dropped lazily, so the result
+        # list is the only list built besides the split itself
+        sentences = filter(None, map(str.strip, story.split(".")))
+        return [
+            {"id": i, "description": sentence + ".", "status": "pending"}
+            for i, sentence in enumerate(sentences, start=1)
+        ]
 
 
 class Supervisor:
@@ -60,17 +54,59 @@ class Supervisor:
     them via the Dev Agent, handling success/failure scenarios and retries.
     """
 
-    def __init__(self, config_path: Optional[str] = None, max_retries: int = 2):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        max_retries: int = 2,
+        in_process: bool = False,
+    ):
         """Initialize the supervisor.
 
         Args:
             config_path: Optional path to configuration file
             max_retries: Maximum number of retries for failed subtasks
+            in_process: If True, call dev-agent's main() directly rather than
+                starting a new interpreter for every attempt
         """
         self.config_path = config_path
         self.max_retries = max_retries
+        self.in_process = in_process
         self.story_parser = StoryParser()
 
+    def _run_dev_agent(self, cmd: List[str]) -> "subprocess.CompletedProcess[str]":
+        """Run dev-agent once and capture its exit code and output.
+
+        Args:
+            cmd: The dev-agent command line
+
+        Returns:
+            The completed run, with stdout and stderr captured as text
+        """
+        if not self.in_process:
+            return subprocess.run(cmd, capture_output=True, text=True)
+
+        # Imported here so a subprocess-only supervisor never loads the agent
+        import dev_agent
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                dev_agent.main()
+                returncode = 0
+            except SystemExit as e:
+                # Same exit status rules as the interpreter applies
+                if e.code is None or isinstance(e.code, int):
+                    returncode = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+        return subprocess.CompletedProcess(
+            cmd, returncode, stdout.getvalue(), stderr.getvalue()
+        )
+
     def _execute_subtask(
         self, subtask: Dict[str, Any], subtask_num: int, total_subtasks: int
     ) -> bool:
@@ -107,7 +143,7 @@ class Supervisor:
             print(f"Running command: {' '.join(cmd)}", file=sys.stderr)
 
             # Execute dev-agent for this subtask
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = self._run_dev_agent(cmd)
 
             print(f"dev-agent exit code: {result.returncode}", file=sys.stderr)
             if result.stderr:
@@ -261,12 +297,20 @@ def create_cli_parser() -> argparse.ArgumentParser:
     run_parser.add_argument(
         "--dry-run", action="store_true", help="Show plan without executing"
     )
+    run_parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run dev-agent inside this process instead of a new one",
+    )
 
     return parser
 
 
 def run_supervisor(
-    story: str, config_path: Optional[str] = None, dry_run: bool = False
+    story: str,
+    config_path: Optional[str] = None,
+    dry_run: bool = False,
+    in_process: bool = False,
 ) -> int:
     """Run the supervisor with the given story.
 
@@ -274,11 +318,12 @@ def run_supervisor(
         story: The feature description to process
         config_path: Optional path to configuration file
         dry_run: If True, only show the plan without executing
+        in_process: If True, run dev-agent inside this process
 
     Returns:
         Exit code (0 for success, non-zero for failure)
     """
-    supervisor = Supervisor(config_path=config_path)
+    supervisor = Supervisor(config_path=config_path, in_process=in_process)
     return supervisor.run(story, dry_run=dry_run)
 
 
@@ -293,7 +338,10 @@ def main() -> int:
 
     if args.command == "run":
         return run_supervisor(
-            story=args.story, config_path=args.config, dry_run=args.dry_run
+            story=args.story,
+            config_path=args.config,
+            dry_run=args.dry_run,
+            in_process=args.in_process,
         )
 
     parser.print_help()
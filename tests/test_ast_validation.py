@@ -6,13 +6,16 @@ Following TDD principles for V1 enhancements.
 """
 
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import DEFAULT, patch
 
 import pytest
 
 from agent_lib.llm_patch_generator import LLMPatchGenerator
 from agent_lib.test_runner import TestFailure
 
+# Source of the file the sample diffs below are written against
+_ORIGINAL_SOURCE = "def example_function():\n    return 1\n"
+
 
 class TestASTValidationAndRetry:
     """Test suite for AST validation and retry functionality."""
@@ -32,10 +35,8 @@ index 1234567..abcdefg 100644
 +    return 2
 """
 
-        original_source = "def example_function():\n    return 1\n"
-
         # Test that AST validation passes for valid patch
-        is_valid = generator.ast_validate_patch(valid_diff, original_source)
+        is_valid = generator.ast_validate_patch(valid_diff, _ORIGINAL_SOURCE)
         assert is_valid is True
 
     def test_ast_validate_patch_syntax_error(self) -> None:
@@ -53,12 +54,80 @@ index 1234567..abcdefg 100644
 +    return 1 +  # Syntax error: incomplete expression
 """
 
-        original_source = "def example_function():\n    return 1\n"
-
         # Should return False for syntactically invalid patch
-        is_valid = generator.ast_validate_patch(invalid_diff, original_source)
+        is_valid = generator.ast_validate_patch(invalid_diff, _ORIGINAL_SOURCE)
         assert is_valid is False
 
+    def test_ast_validate_patch_in_later_statement(self) -> None:
+        """Test AST validation of a hunk that only touches a later function."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        original_source = (
+            "import os\n\n\ndef first():\n    return os.sep\n\n\n"
+            "def second():\n    return 1\n"
+        )
+        header = "--- a/example.py\n+++ b/example.py\n@@ -8,2 +8,2 @@\n"
+
+        valid_diff = header + " def second():\n-    return 1\n+    return 2\n"
+        invalid_diff = header + " def second():\n-    return 1\n+    return (\n"
+
+        assert generator.ast_validate_patch(valid_diff, original_source) is True
+        assert generator.ast_validate_patch(invalid_diff, original_source) is False
+
+    def test_ast_validate_patch_only_uses_hunks_for_the_file(self) -> None:
+        """Test that hunks for other files in the diff are not applied."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        example = (
+            "--- a/example.py\n+++ b/example.py\n@@ -1,2 +1,2 @@\n"
+            " def example_function():\n-    return 1\n+    return 2\n"
+        )
+        broken_other = (
+            "--- a/other.py\n+++ b/other.py\n@@ -1,2 +1,2 @@\n"
+            " def example_function():\n-    return 1\n+    return (\n"
+        )
+
+        for diff in (example + broken_other, broken_other + example):
+            assert generator.ast_validate_patch(diff, _ORIGINAL_SOURCE, "example.py")
+            assert not generator.ast_validate_patch(diff, _ORIGINAL_SOURCE, "other.py")
+        # Without a path, only the first file's hunks are applied
+        assert generator.ast_validate_patch(example + broken_other, _ORIGINAL_SOURCE)
+        # A diff with no section for the file says nothing good about it
+        assert not generator.ast_validate_patch(
+            example, _ORIGINAL_SOURCE, "tests/test_example.py"
+        )
+
+    def test_generate_patch_validates_files_other_than_the_failing_one(
+        self, tmp_path: Path
+    ) -> None:
+        """Test that a patch to a source file is checked against that file."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "mod.py").write_text(_ORIGINAL_SOURCE)
+        (tmp_path / "tests").mkdir()
+        (tmp_path / "tests" / "test_mod.py").write_text(
+            "from src.mod import example_function\n"
+        )
+        test_failure = TestFailure(
+            test_name="test_example",
+            file_path="tests/test_mod.py",
+            error_output="AssertionError: assert 1 == 2",
+        )
+        header = "--- a/src/mod.py\n+++ b/src/mod.py\n@@ -1,2 +1,2 @@\n"
+        broken = header + " def example_function():\n-    return 1\n+    return (\n"
+        valid = header + " def example_function():\n-    return 1\n+    return 2\n"
+
+        with (
+            patch.dict("os.environ", {"DEV_AGENT_CACHE": "off"}),
+            patch.object(generator, "_call_llm") as mock_llm,
+        ):
+            mock_llm.side_effect = [broken, valid]
+            result = generator.generate_patch(test_failure, tmp_path)
+
+        # The broken patch is rejected and retried
+        assert mock_llm.call_count == 2
+        assert result.diff_content == valid
+
     def test_generate_patch_with_retry_on_syntax_error(self) -> None:
         """Test that patch generation retries on syntax errors."""
         generator = LLMPatchGenerator(model_path="test_model.gguf")
@@ -86,24 +155,74 @@ index 1234567..abcdefg 100644
 +    return 2
 """
 
-        with patch.object(generator, "_call_llm") as mock_llm:
+        # Mock file reading so the retry mechanism is used
+        with (
+            patch.multiple(
+                generator, _call_llm=DEFAULT, ast_validate_patch=DEFAULT
+            ) as mocks,
+            patch.object(Path, "read_text", return_value=_ORIGINAL_SOURCE),
+        ):
+            # First call returns invalid, second call returns valid
+            mocks["_call_llm"].side_effect = [invalid_diff, valid_diff]
+            # First invalid, then valid
+            mocks["ast_validate_patch"].side_effect = [False, True]
+
+            result = generator.generate_patch(test_failure, Path("/test/repo"))
+
+        # Should retry once and succeed
+        assert mocks["_call_llm"].call_count == 2
+        assert mocks["ast_validate_patch"].call_count == 2
+        assert result.diff_content == valid_diff
+
+    def test_generate_patch_with_retry_reads_source_once(self) -> None:
+        """Test that retries reuse the source read for AST validation."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        test_failure = TestFailure(
+            test_name="test_example",
+            file_path="example.py",
+            error_output="AssertionError: assert 1 == 2",
+        )
+
+        with patch.object(
+            Path, "read_text", return_value=_ORIGINAL_SOURCE
+        ) as mock_read:
             with patch.object(generator, "ast_validate_patch") as mock_validate:
-                # Mock file reading so the retry mechanism is used
-                mock_original_source = "def example_function():\n    return 1\n"
-                with patch.object(Path, "read_text", return_value=mock_original_source):
-                    # First call returns invalid, second call returns valid
-                    mock_llm.side_effect = [invalid_diff, valid_diff]
-                    mock_validate.side_effect = [
-                        False,
-                        True,
-                    ]  # First invalid, then valid
-
-                    result = generator.generate_patch(test_failure, Path("/test/repo"))
-
-                # Should retry once and succeed
-                assert mock_llm.call_count == 2
-                assert mock_validate.call_count == 2
-                assert result.diff_content == valid_diff
+                mock_validate.side_effect = [False, True]
+
+                generator.generate_patch(test_failure, Path("/test/repo"))
+
+        # One read serves both attempts' prompts and validation
+        assert mock_validate.call_count == 2
+        assert mock_read.call_count == 1
+
+    def test_generate_patch_with_retry_reuses_retry_prompt(self) -> None:
+        """Test that every retry sends the same syntax-error retry prompt."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        test_failure = TestFailure(
+            test_name="test_example",
+            file_path="example.py",
+            error_output="AssertionError: assert 1 == 2",
+        )
+
+        with patch.object(Path, "read_text", return_value="x = 1\n"):
+            with patch.object(generator, "_call_llm") as mock_llm:
+                with patch.object(generator, "ast_validate_patch") as mock_validate:
+                    mock_llm.return_value = "diff"
+                    mock_validate.side_effect = [False, False, True]
+
+                    generator.generate_patch(test_failure, Path("/test/repo"))
+
+        first, second, third = (call.args[0] for call in mock_llm.call_args_list)
+        assert first is test_failure
+        assert second is third
+        assert second.error_output.startswith(
+            "Fix test failure: AssertionError: assert 1 == 2"
+        )
+        assert "IMPORTANT: Your previous patch had syntax errors." in (
+            second.error_output
+        )
 
     def test_generate_patch_max_retries_exceeded(self) -> None:
         """Test that patch generation fails after max retries."""
@@ -123,14 +242,17 @@ index 1234567..abcdefg 100644
 +    return 1 +  # Always syntax error
 """
 
-        with patch("pathlib.Path.read_text", return_value="def example(): return 1"):
-            with patch.object(generator, "_call_llm") as mock_llm:
-                with patch.object(generator, "ast_validate_patch") as mock_validate:
-                    mock_llm.return_value = invalid_diff
-                    mock_validate.return_value = False  # Always invalid
-                    # Should raise after max retries
-                    with pytest.raises(Exception):
-                        generator.generate_patch(test_failure, Path("/test/repo"))
+        with (
+            patch("pathlib.Path.read_text", return_value="def example(): return 1"),
+            patch.multiple(
+                generator, _call_llm=DEFAULT, ast_validate_patch=DEFAULT
+            ) as mocks,
+        ):
+            mocks["_call_llm"].return_value = invalid_diff
+            mocks["ast_validate_patch"].return_value = False  # Always invalid
+            # Should raise after max retries
+            with pytest.raises(Exception):
+                generator.generate_patch(test_failure, Path("/test/repo"))
 
     def test_apply_diff_to_source_helper(self) -> None:
         """Test the helper function that applies diff to source code."""
@@ -164,3 +286,37 @@ def other_function():
             except ImportError:
                 # Function not implemented yet
                 pass
+
+    def test_apply_diff_to_source_applies_every_hunk(self) -> None:
+        """Test that multi-hunk diffs are applied at their header positions."""
+        from agent_lib.llm_patch_generator import apply_diff_to_source
+
+        original_source = "".join(f"line{i}\n" for i in range(1, 11))
+
+        diff = """--- a/example.py
++++ b/example.py
+@@ -2,1 +2,1 @@
+-line2
++LINE2
+@@ -8,2 +8,3 @@
+ line8
+-line9
++LINE9
++inserted
+"""
+
+        result = apply_diff_to_source(original_source, diff)
+
+        assert result.splitlines() == [
+            "line1",
+            "LINE2",
+            "line3",
+            "line4",
+            "line5",
+            "line6",
+            "line7",
+            "line8",
+            "LINE9",
+            "inserted",
+            "line10",
+        ]
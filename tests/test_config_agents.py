@@ -4,70 +4,59 @@ Tests for the agents configuration that defines separate LLM backends
 for supervisor and dev-agent roles.
 """
 
+import pytest
+
 from agent_lib.config_schema import AgentConfig, AgentRoleConfig, AgentsConfig
 
+# Shared example role configs; tests only read them
+_SUPERVISOR: AgentRoleConfig = {"backend": "ollama", "model": "gpt-o3"}
+_DEV_AGENT: AgentRoleConfig = {"backend": "codellama", "model": "codellama-13b"}
+_AGENTS: AgentsConfig = {"supervisor": _SUPERVISOR, "dev_agent": _DEV_AGENT}
+_VALID_CONFIG: AgentConfig = {
+    "max_iterations": 5,
+    "test_command": "pytest",
+    "test": {"fast_confirm": True},
+    "git": {"branch_prefix": "dev-agent/fix", "remote": "origin", "auto_pr": True},
+    "llm": {"model_path": "/path/to/model"},
+    "metrics": {"enabled": True, "storage_path": None},
+    "agents": _AGENTS,
+}
+
 
 def test_agent_role_config_structure():
     """Test that AgentRoleConfig has the correct structure."""
-    # Test that we can create valid agent role configs
-    supervisor_config: AgentRoleConfig = {"backend": "ollama", "model": "gpt-o3"}
-
-    dev_agent_config: AgentRoleConfig = {
-        "backend": "codellama",
-        "model": "codellama-13b",
-    }
-
-    assert supervisor_config["backend"] == "ollama"
-    assert supervisor_config["model"] == "gpt-o3"
-    assert dev_agent_config["backend"] == "codellama"
-    assert dev_agent_config["model"] == "codellama-13b"
-
-
-def test_agents_config_structure():
-    """Test that AgentsConfig requires both supervisor and dev_agent."""
-    agents_config: AgentsConfig = {
-        "supervisor": {"backend": "ollama", "model": "gpt-o3"},
-        "dev_agent": {"backend": "codellama", "model": "codellama-13b"},
-    }
-
-    assert "supervisor" in agents_config
-    assert "dev_agent" in agents_config
-    assert agents_config["supervisor"]["backend"] == "ollama"
-    assert agents_config["dev_agent"]["backend"] == "codellama"
-
-
-def test_valid_agents_config():
-    """Test that a valid agents configuration is accepted."""
-    valid_config: AgentConfig = {
-        "max_iterations": 5,
-        "test_command": "pytest",
-        "git": {"branch_prefix": "dev-agent/fix", "remote": "origin", "auto_pr": True},
-        "llm": {"model_path": "/path/to/model"},
-        "metrics": {"enabled": True, "storage_path": None},
-        "agents": {
-            "supervisor": {"backend": "ollama", "model": "gpt-o3"},
-            "dev_agent": {"backend": "codellama", "model": "codellama-13b"},
-        },
-    }
-
-    # Check that agents section is properly typed
-    assert "agents" in valid_config
-    assert "supervisor" in valid_config["agents"]
-    assert "dev_agent" in valid_config["agents"]
-    assert valid_config["agents"]["supervisor"]["backend"] == "ollama"
-    assert valid_config["agents"]["supervisor"]["model"] == "gpt-o3"
-    assert valid_config["agents"]["dev_agent"]["backend"] == "codellama"
-    assert valid_config["agents"]["dev_agent"]["model"] == "codellama-13b"
-
-
-def test_all_backend_types_accepted():
+    assert _SUPERVISOR["backend"] == "ollama"
+    assert _SUPERVISOR["model"] == "gpt-o3"
+    assert _DEV_AGENT["backend"] == "codellama"
+    assert _DEV_AGENT["model"] == "codellama-13b"
+
+
+@pytest.mark.parametrize(
+    "config,path,expected",
+    [
+        (_AGENTS, ["supervisor", "backend"], "ollama"),
+        (_AGENTS, ["dev_agent", "backend"], "codellama"),
+        (_VALID_CONFIG, ["agents", "supervisor", "backend"], "ollama"),
+        (_VALID_CONFIG, ["agents", "supervisor", "model"], "gpt-o3"),
+        (_VALID_CONFIG, ["agents", "dev_agent", "backend"], "codellama"),
+        (_VALID_CONFIG, ["agents", "dev_agent", "model"], "codellama-13b"),
+    ],
+)
+def test_agents_config_structure(config, path, expected):
+    """Test that agents sections hold both supervisor and dev_agent roles."""
+    value = config
+    for key in path:
+        assert key in value
+        value = value[key]
+    assert value == expected
+
+
+@pytest.mark.parametrize("backend", ["ollama", "openai", "llama-cpp", "codellama"])
+def test_all_backend_types_accepted(backend):
     """Test that all supported backend types are accepted."""
-    backends = ["ollama", "openai", "llama-cpp", "codellama"]
-
-    for backend in backends:
-        config: AgentRoleConfig = {"backend": backend, "model": f"test-model-{backend}"}
-        assert config["backend"] == backend
-        assert config["model"] == f"test-model-{backend}"
+    config: AgentRoleConfig = {"backend": backend, "model": f"test-model-{backend}"}
+    assert config["backend"] == backend
+    assert config["model"] == f"test-model-{backend}"
 
 
 def test_agents_config_with_different_backends():
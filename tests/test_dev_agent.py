@@ -8,6 +8,7 @@ All tests use mocked dependencies to ensure we're testing only the
 orchestrator logic without actual LLM calls or git operations.
 """
 
+from pathlib import Path
 from typing import Callable, Dict, Generator, List, TypedDict
 from unittest.mock import MagicMock, patch
 
@@ -15,6 +16,7 @@ import pytest
 from pytest import MonkeyPatch
 
 import dev_agent
+from agent_lib.test_runner import TestFailure, _parse_pytest_failures
 from dev_agent import ConfigError, NoTestsFoundError
 
 
@@ -134,10 +136,12 @@ class TestDevAgentOrchestrator:
         }
 
         mock_test_runner = MagicMock()
-        # First call returns failure, second call returns success
+        # First call returns failure, the retests of the last failure and of
+        # the full suite return success
         mock_test_runner.run_tests.side_effect = [
             {"passed": False, "failures": [test_failure]},
             {"passed": True, "failures": []},
+            {"passed": True, "failures": []},
         ]
 
         mock_llm_generator = MagicMock()
@@ -179,8 +183,16 @@ class TestDevAgentOrchestrator:
         mock_git_tool.apply_patch.assert_called_once_with(
             mock_patch_result.diff_content
         )
-        mock_git_tool.commit.assert_called_once_with("TDD: fix test_example")
+        mock_git_tool.commit.assert_called_once_with(
+            "TDD: fix test_example", ["example.py"]
+        )
         mock_git_tool.push.assert_called_once()
+        mock_llm_generator.cache_patch.assert_called_once_with(mock_patch_result)
+        assert [c.args[0] for c in mock_test_runner.run_tests.call_args_list] == [
+            "pytest --maxfail=1",
+            "pytest --maxfail=1 test_example.py::test_example",
+            "pytest --maxfail=1",
+        ]
 
     def test_max_iterations_reached_exits_one(self, monkeypatch: MonkeyPatch) -> None:
         """Test exit code 1 when max iterations reached without success."""
@@ -224,6 +236,8 @@ class TestDevAgentOrchestrator:
 
         # Assert patch generation was called twice
         assert mock_llm_generator.generate_patch.call_count == 2
+        # Patches that never made the tests pass are not cached
+        mock_llm_generator.cache_patch.assert_not_called()
 
         # Assert branch creation was called twice with iteration numbers
         expected_calls = [
@@ -236,6 +250,170 @@ class TestDevAgentOrchestrator:
         # Assert push is never called on failure
         mock_git_tool.push.assert_not_called()
 
+        # A failing focused retest skips the full-suite retest
+        assert mock_test_runner.run_tests.call_count == 4
+
+    def test_cosmetic_patch_skips_full_rerun(self, monkeypatch: MonkeyPatch) -> None:
+        """Test that comment-only patches that fix nothing reuse the result."""
+        test_failure: FailureInfo = {
+            "test_name": "test_persistent_failure",
+            "file_path": "test_example.py",
+            "error_output": "AssertionError: stubborn failure",
+        }
+
+        mock_test_runner = MagicMock()
+        mock_test_runner.run_tests.return_value = {
+            "passed": False,
+            "failures": [test_failure],
+        }
+
+        mock_llm_generator = MagicMock()
+        mock_git_tool = MagicMock()
+        mock_config: DevAgentConfig = {
+            "max_iterations": 2,
+            "test_command": "pytest --maxfail=1",
+            "git": {"branch_prefix": "dev-agent/fix"},
+            "llm": {"model_path": "models/test.gguf"},
+        }
+        monkeypatch.setattr("dev_agent._load_config", lambda: mock_config)
+        monkeypatch.setattr("dev_agent.TestRunner", lambda x: mock_test_runner)
+        monkeypatch.setattr("dev_agent.LLMPatchGenerator", lambda x: mock_llm_generator)
+        monkeypatch.setattr("dev_agent.GitTool", lambda: mock_git_tool)
+        monkeypatch.setattr("dev_agent.is_cosmetic_patch", lambda diff, repo: True)
+
+        with pytest.raises(SystemExit) as exc_info:
+            dev_agent.main()
+
+        assert exc_info.value.code == 1
+        # Both patches are still tried and checked on the failing test, but
+        # the full suite only runs once
+        assert mock_llm_generator.generate_patch.call_count == 2
+        assert mock_git_tool.commit.call_count == 2
+        assert [c.args[0] for c in mock_test_runner.run_tests.call_args_list] == [
+            "pytest --maxfail=1",
+            "pytest --maxfail=1 test_example.py::test_persistent_failure",
+            "pytest --maxfail=1 test_example.py::test_persistent_failure",
+        ]
+
+    def test_cosmetic_patch_that_fixes_test_succeeds(
+        self, monkeypatch: MonkeyPatch
+    ) -> None:
+        """Test that a formatting-only fix is kept when it makes tests pass."""
+        test_failure: FailureInfo = {
+            "test_name": "test_black_formatting",
+            "file_path": "tests/test_lint_format.py",
+            "error_output": "AssertionError: would reformat example.py",
+        }
+
+        mock_test_runner = MagicMock()
+        mock_test_runner.run_tests.side_effect = [
+            {"passed": False, "failures": [test_failure]},
+            {"passed": True, "failures": []},
+            {"passed": True, "failures": []},
+        ]
+        mock_git_tool = MagicMock()
+        mock_config: DevAgentConfig = {
+            "max_iterations": 2,
+            "test_command": "pytest --maxfail=1",
+            "git": {"branch_prefix": "dev-agent/fix"},
+            "llm": {"model_path": "models/test.gguf"},
+        }
+        monkeypatch.setattr("dev_agent._load_config", lambda: mock_config)
+        monkeypatch.setattr("dev_agent.TestRunner", lambda x: mock_test_runner)
+        monkeypatch.setattr("dev_agent.LLMPatchGenerator", lambda x: MagicMock())
+        monkeypatch.setattr("dev_agent.GitTool", lambda: mock_git_tool)
+        monkeypatch.setattr("dev_agent.MetricsStorage", lambda: MagicMock())
+        monkeypatch.setattr("dev_agent.is_cosmetic_patch", lambda diff, repo: True)
+
+        with pytest.raises(SystemExit) as exc_info:
+            dev_agent.main()
+
+        assert exc_info.value.code == 0
+        mock_git_tool.push.assert_called_once()
+
+    def test_unselectable_retest_falls_back_to_full_run(
+        self, monkeypatch: MonkeyPatch
+    ) -> None:
+        """Test that a focused retest pytest cannot select runs the full suite."""
+        test_failure: FailureInfo = {
+            "test_name": "test_p[a b]",
+            "file_path": "test_example.py",
+            "error_output": "assert 0",
+        }
+
+        mock_test_runner = MagicMock()
+        mock_test_runner.run_tests.side_effect = [
+            {"passed": False, "failures": [test_failure]},
+            # ERROR: not found
+            {"passed": False, "failures": [], "exit_code": 4},
+            {"passed": True, "failures": [], "exit_code": 0},
+        ]
+        mock_git_tool = MagicMock()
+        mock_config: DevAgentConfig = {
+            "max_iterations": 2,
+            "test_command": "pytest --maxfail=1",
+            "git": {"branch_prefix": "dev-agent/fix"},
+            "llm": {"model_path": "models/test.gguf"},
+        }
+        monkeypatch.setattr("dev_agent._load_config", lambda: mock_config)
+        monkeypatch.setattr("dev_agent.TestRunner", lambda x: mock_test_runner)
+        monkeypatch.setattr("dev_agent.LLMPatchGenerator", lambda x: MagicMock())
+        monkeypatch.setattr("dev_agent.GitTool", lambda: mock_git_tool)
+        monkeypatch.setattr("dev_agent.MetricsStorage", lambda: MagicMock())
+
+        with pytest.raises(SystemExit) as exc_info:
+            dev_agent.main()
+
+        assert exc_info.value.code == 0
+        mock_git_tool.push.assert_called_once()
+        assert mock_test_runner.run_tests.call_args_list[2].args[0] == (
+            "pytest --maxfail=1"
+        )
+
+    def test_committed_fix_confirmed_next_iteration_is_finished(
+        self, monkeypatch: MonkeyPatch
+    ) -> None:
+        """Test that a fix whose retest failed is pushed once the tests pass."""
+        test_failure: FailureInfo = {
+            "test_name": "test_flaky",
+            "file_path": "test_example.py",
+            "error_output": "assert 0",
+        }
+
+        mock_test_runner = MagicMock()
+        mock_test_runner.run_tests.side_effect = [
+            {"passed": False, "failures": [test_failure]},
+            {"passed": False, "failures": [test_failure]},
+            {"passed": True, "failures": []},
+        ]
+        mock_llm_generator = MagicMock()
+        mock_git_tool = MagicMock()
+        mock_storage = MagicMock()
+        mock_config: DevAgentConfig = {
+            "max_iterations": 3,
+            "test_command": "pytest --maxfail=1",
+            "git": {"branch_prefix": "dev-agent/fix"},
+            "llm": {"model_path": "models/test.gguf"},
+        }
+        monkeypatch.setattr("dev_agent._load_config", lambda: mock_config)
+        monkeypatch.setattr("dev_agent.TestRunner", lambda x: mock_test_runner)
+        monkeypatch.setattr("dev_agent.LLMPatchGenerator", lambda x: mock_llm_generator)
+        monkeypatch.setattr("dev_agent.GitTool", lambda: mock_git_tool)
+        monkeypatch.setattr("dev_agent.MetricsStorage", lambda: mock_storage)
+
+        with pytest.raises(SystemExit) as exc_info:
+            dev_agent.main()
+
+        assert exc_info.value.code == 0
+        assert mock_llm_generator.generate_patch.call_count == 1
+        mock_llm_generator.cache_patch.assert_called_once_with(
+            mock_llm_generator.generate_patch.return_value
+        )
+        mock_git_tool.push.assert_called_once()
+        recorded = mock_storage.append_patch_result.call_args.args[0]
+        assert recorded.success is True
+        assert recorded.iterations == 1
+
     def test_patch_validation_failure_exits_two(self, monkeypatch: MonkeyPatch) -> None:
         """Test exit code 2 when patch validation fails."""
         # Arrange
@@ -298,6 +476,7 @@ class TestDevAgentOrchestrator:
         mock_test_runner.run_tests.side_effect = [
             {"passed": False, "failures": [test_failure]},
             {"passed": True, "failures": []},
+            {"passed": True, "failures": []},
         ]
 
         mock_llm_generator = MagicMock()
@@ -434,3 +613,112 @@ class TestDevAgentOrchestrator:
         )
         mock_git_tool.commit.assert_not_called()
         mock_git_tool.push.assert_not_called()
+
+
+class TestGitTool:
+    """Test suite for GitTool subprocess usage."""
+
+    def test_apply_patch_runs_git_apply_once(self) -> None:
+        """Test that a patch is validated and applied by one git apply."""
+        with patch("dev_agent.subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+
+            assert dev_agent.GitTool().apply_patch("diff") is True
+
+        mock_run.assert_called_once_with(
+            ["git", "apply"], input=b"diff", capture_output=True
+        )
+
+    def test_commit_stages_only_given_files(self) -> None:
+        """Test that commit adds the patched paths rather than the whole tree."""
+        with patch("dev_agent.subprocess.run") as mock_run:
+            assert dev_agent.GitTool().commit("msg", ["a.py", "b c.py"]) is True
+            assert dev_agent.GitTool().commit("msg") is True
+
+        add_calls = [c.args[0] for c in mock_run.call_args_list if "add" in c.args[0]]
+        assert add_calls == [
+            ["git", "add", "--", "a.py", "b c.py"],
+            ["git", "add", "."],
+        ]
+
+    def test_apply_patch_failure_raises(self) -> None:
+        """Test that a rejected patch raises with git's error message."""
+        with patch("dev_agent.subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(
+                returncode=1, stderr=b"error: patch failed: example.py:1\n"
+            )
+
+            with pytest.raises(dev_agent.PatchApplicationError, match="example.py"):
+                dev_agent.GitTool().apply_patch("diff")
+
+
+def test_sanitize_branch_name_replaces_invalid_characters() -> None:
+    """Test that characters git rejects in branch names become hyphens."""
+    sanitize = dev_agent._sanitize_branch_name
+
+    assert sanitize("dev-agent/fix_test_add[1-2]") == "dev-agent/fix_test_add-1-2"
+    assert sanitize("dev-agent/fix_test_a::b c~d") == "dev-agent/fix_test_a-b-c-d"
+    assert sanitize("dev-agent/fix") == "dev-agent/fix"
+
+
+def test_focused_retest_command_targets_failing_node() -> None:
+    """Test that retests narrow pytest commands to the failing test."""
+    focused = dev_agent._focused_retest_command
+    # Short test summary of a real "pytest -v" run
+    output = (
+        "FAILED tests/test_m.py::test_p[a b] - assert 0\n"
+        "FAILED tests/test_m.py::test_p[c - d] - assert 0\n"
+        "FAILED tests/test_m.py::TestMath::test_add - assert 0\n"
+    )
+    spaced, dashed, method = _parse_pytest_failures(output)
+    discovery = TestFailure("discovery_error", "tests/test_m.py", "")
+
+    assert focused("pytest -x", spaced) == "pytest -x 'tests/test_m.py::test_p[a b]'"
+    assert focused("pytest -x", dashed) == (
+        "pytest -x 'tests/test_m.py::test_p[c - d]'"
+    )
+    assert focused("pytest -x", method) == (
+        "pytest -x tests/test_m.py::TestMath::test_add"
+    )
+    assert focused("pytest -x", discovery) is None
+    assert focused("pytest -x", TestFailure("unknown", "unknown", "")) is None
+    assert focused("pytest -x", TestFailure("test_a", "", "")) is None
+    assert focused("make test", method) is None
+
+
+def test_load_config_is_cached_and_read_only() -> None:
+    """Test that the shared configuration cannot be modified by callers."""
+    config = dev_agent._load_config()
+
+    assert dev_agent._load_config() is config
+    with pytest.raises(TypeError):
+        config["git"]["auto_pr"] = False  # type: ignore[index]
+
+
+def test_apply_patch_edits_single_file_without_git(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    """Test that exact single-file patches are applied in-process."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "example.py").write_text("def example():\n    return 1\n")
+    diff = (
+        "diff --git a/example.py b/example.py\n"
+        "--- a/example.py\n"
+        "+++ b/example.py\n"
+        "@@ -1,2 +1,2 @@\n"
+        " def example():\n"
+        "-    return 1\n"
+        "+    return 2\n"
+    )
+
+    with patch("dev_agent.subprocess.run") as mock_run:
+        assert dev_agent.GitTool().apply_patch(diff) is True
+        mock_run.assert_not_called()
+
+        # Context that no longer matches is left for git apply to judge
+        mock_run.return_value = MagicMock(returncode=0, stderr=b"")
+        assert dev_agent.GitTool().apply_patch(diff) is True
+        mock_run.assert_called_once()
+
+    assert (tmp_path / "example.py").read_text() == "def example():\n    return 2\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["example.py"]
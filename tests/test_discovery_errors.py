@@ -6,8 +6,16 @@ Following TDD principles for V1 enhancements.
 """
 
 from pathlib import Path
+from typing import Any, List
 
-from agent_lib.test_runner import check_for_discovery_errors, run_tests
+import pytest
+
+from agent_lib import test_runner
+from agent_lib.test_runner import (
+    check_for_discovery_errors,
+    fast_syntax_precheck,
+    run_tests,
+)
 
 
 class TestDiscoveryErrorDetection:
@@ -109,3 +117,118 @@ def broken_function(
 
         # Eventually should catch this before running pytest
         assert result.passed is False
+
+    def test_fast_syntax_precheck_writes_no_bytecode(self, tmp_path: Path) -> None:
+        """Test that the syntax pre-check compiles in memory only."""
+        project = tmp_path / "toy_precheck"
+        project.mkdir()
+        (project / "valid.py").write_text("x = 1\n")
+        (project / "broken.py").write_text("def broken(:\n    pass\n")
+
+        error = fast_syntax_precheck(project)
+
+        assert error is not None
+        assert error["status"] == "discovery_error"
+        assert error["file_path"] == "broken.py"
+        assert "SyntaxError" in error["error"]
+        assert not (project / "__pycache__").exists()
+
+    def test_fast_syntax_precheck_skips_environment_dirs(self, tmp_path: Path) -> None:
+        """Test that virtualenvs and caches are not searched for errors."""
+        project = tmp_path / "toy_precheck_skip"
+        (project / "pkg").mkdir(parents=True)
+        (project / "pkg" / "module.py").write_text("x = 1\n")
+        for skipped in (".venv", "node_modules", "build"):
+            (project / skipped).mkdir()
+            (project / skipped / "broken.py").write_text("def broken(:\n")
+
+        assert fast_syntax_precheck(project) is None
+
+        (project / "pkg" / "broken.py").write_text("def broken(:\n")
+        error = fast_syntax_precheck(project)
+        assert error is not None
+        assert error["file_path"] == str(Path("pkg") / "broken.py")
+
+    def test_fast_syntax_precheck_checks_nested_build_packages(
+        self, tmp_path: Path
+    ) -> None:
+        """Test that build and dist are only skipped at the repository root."""
+        project = tmp_path / "toy_precheck_nested"
+        (project / "pkg" / "build").mkdir(parents=True)
+        (project / "pkg" / "build" / "broken.py").write_text("def broken(:\n")
+
+        error = fast_syntax_precheck(project)
+
+        assert error is not None
+        assert error["file_path"] == str(Path("pkg") / "build" / "broken.py")
+
+    def test_fast_syntax_precheck_skips_unreadable_dirs(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a directory that cannot be listed does not stop the check."""
+        project = tmp_path / "toy_precheck_unreadable"
+        (project / "locked").mkdir(parents=True)
+        (project / "broken.py").write_text("def broken(:\n")
+        real_scandir = test_runner.os.scandir
+
+        def scandir(path: Any) -> Any:
+            if Path(path).name == "locked":
+                raise PermissionError(13, "Permission denied", str(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(test_runner.os, "scandir", scandir)
+
+        error = fast_syntax_precheck(project)
+
+        assert error is not None
+        assert error["file_path"] == "broken.py"
+
+    def test_fast_syntax_precheck_skips_unchanged_files(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that files that passed before are only re-checked on change."""
+        project = tmp_path / "toy_precheck_cache"
+        project.mkdir()
+        module = project / "module.py"
+        module.write_text("x = 1\n")
+        assert fast_syntax_precheck(project) is None
+
+        compile_calls: List[str] = []
+
+        def fake_compile(
+            source: bytes, filename: str, *args: Any, **kwargs: Any
+        ) -> Any:
+            compile_calls.append(filename)
+            return compile(source, filename, *args, **kwargs)
+
+        monkeypatch.setattr(test_runner, "compile", fake_compile, raising=False)
+
+        assert fast_syntax_precheck(project) is None
+        assert compile_calls == []
+
+        module.write_text("def broken(:\n")
+        error = fast_syntax_precheck(project)
+
+        assert compile_calls == [str(module)]
+        assert error is not None
+        assert error["file_path"] == "module.py"
+
+    def test_fast_syntax_precheck_parallel_reports_first_error(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that compiling in worker processes keeps walk-order results."""
+        monkeypatch.setattr(test_runner, "_PARALLEL_PRECHECK_MIN_FILES", 1)
+        monkeypatch.setattr(test_runner.os, "cpu_count", lambda: 2)
+        project = tmp_path / "toy_precheck_parallel"
+        project.mkdir()
+        for index in range(5):
+            (project / f"module_{index}.py").write_text(f"x = {index}\n")
+        assert fast_syntax_precheck(project) is None
+
+        broken = project / "module_3.py"
+        broken.write_text("def broken(:\n")
+        error = fast_syntax_precheck(project)
+
+        assert error is not None
+        assert error["file_path"] == broken.name
+        assert "SyntaxError" in error["error"]
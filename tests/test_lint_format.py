@@ -5,6 +5,7 @@ formatting and linting before committing patches.
 Following TDD principles for V1 enhancements.
 """
 
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -66,6 +67,53 @@ class TestLintAndFormatChecking:
             assert result["passed"] is False
             assert "E302" in result["error"]
 
+    def test_git_tool_checks_several_files_in_one_run(self) -> None:
+        """Test that several files share one black and one flake8 run."""
+        git_tool = GitTool()
+        report = (
+            "a.py:1:1: E302 expected 2 blank lines\n"
+            "b.py:3:80: E501 line too long\n"
+            "a.py:9:1: W391 blank line at end of file\n"
+        )
+
+        def mock_subprocess_side_effect(*args: tuple, **kwargs: dict) -> MagicMock:
+            if "flake8" in args[0]:
+                return MagicMock(returncode=1, stdout=report, stderr="")
+            return MagicMock(returncode=0)
+
+        with patch(
+            "subprocess.run", side_effect=mock_subprocess_side_effect
+        ) as mock_run:
+            result = git_tool.check_format_and_lint(["a.py", "b.py"])
+
+        assert mock_run.call_count == 2
+        for call in mock_run.call_args_list:
+            assert call.args[0][-2:] == ["a.py", "b.py"]
+        assert result["passed"] is False
+        assert result["lint_errors"] == {
+            "a.py": [
+                "a.py:1:1: E302 expected 2 blank lines",
+                "a.py:9:1: W391 blank line at end of file",
+            ],
+            "b.py": ["b.py:3:80: E501 line too long"],
+        }
+
+    def test_git_tool_format_and_lint_run_concurrently(self) -> None:
+        """Test that black and flake8 are started without waiting on each other."""
+        git_tool = GitTool()
+        # Each check blocks until the other has started; run one after the
+        # other, the first would time out and break the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def mock_subprocess_side_effect(*args: tuple, **kwargs: dict) -> MagicMock:
+            barrier.wait()
+            return MagicMock(returncode=0)
+
+        with patch("subprocess.run", side_effect=mock_subprocess_side_effect):
+            result = git_tool.check_format_and_lint("example.py")
+
+        assert result["passed"] is True
+
     def test_commit_with_format_lint_check(self) -> None:
         """Test enhanced commit method that checks format and lint."""
         git_tool = GitTool()
@@ -5,7 +5,9 @@ using a local LLM based on test failure information. Following TDD
 principles as outlined in docs/PROJECT-OUTLINE.md Phase 2.
 """
 
+import asyncio
 from pathlib import Path
+from typing import List
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -14,6 +16,9 @@ from agent_lib.llm_patch_generator import (
     LLMPatchGenerator,
     PatchGenerationError,
     PatchResult,
+    apply_diff_exactly,
+    diff_file_paths,
+    is_cosmetic_patch,
 )
 from agent_lib.test_runner import TestFailure
 
@@ -89,6 +94,7 @@ index 1234567..abcdefg 100644
             assert "git" in call_args
             assert "apply" in call_args
             assert "--check" in call_args
+            assert mock_run.call_args[1]["input"] == valid_diff.encode("utf-8")
 
     def test_validate_patch_fails_with_invalid_diff(self) -> None:
         """Test patch validation fails with invalid diff."""
@@ -104,6 +110,8 @@ index 1234567..abcdefg 100644
             is_valid = generator.validate_patch(invalid_diff, repo_path)
 
             assert is_valid is False
+            # A diff without file header and hunk is rejected without git
+            mock_run.assert_not_called()
 
     def test_generate_patch_raises_error_on_llm_failure(self) -> None:
         """Test that patch generation raises error when LLM fails."""
@@ -128,3 +136,135 @@ index 1234567..abcdefg 100644
 
         assert generator.model_path == model_path
         # Should not raise an exception during initialization
+
+    def test_patch_result_is_immutable(self) -> None:
+        """Test that patch results cannot be modified after creation."""
+        result = PatchResult(diff_content="diff", confidence_score=0.5)
+
+        with pytest.raises(AttributeError):
+            result.diff_content = "other"  # type: ignore[misc]
+        assert not hasattr(result, "__dict__")
+
+    @pytest.mark.parametrize(
+        "model_path,expected_backend",
+        [
+            ("ollama:codellama", "ollama"),
+            ("llama-cpp:models/codellama.gguf", "llama-cpp"),
+            ("models/codellama.gguf", "llama-cpp"),
+        ],
+    )
+    def test_backend_is_resolved_once(
+        self, model_path: str, expected_backend: str
+    ) -> None:
+        """Test that the backend is resolved from the model path up front."""
+        generator = LLMPatchGenerator(model_path=model_path)
+
+        assert generator._backend == expected_backend
+
+    def test_generate_patch_async_runs_failures_concurrently(self) -> None:
+        """Test generating patches for several failures on one event loop."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        failures = [
+            TestFailure(
+                test_name=f"test_{i}",
+                file_path="test_example.py",
+                error_output="Error",
+            )
+            for i in range(3)
+        ]
+
+        async def generate_all() -> List[PatchResult]:
+            return await asyncio.gather(
+                *(
+                    generator.generate_patch_async(failure, Path("/test/repo"))
+                    for failure in failures
+                )
+            )
+
+        with patch.object(generator, "_call_llm") as mock_llm:
+            mock_llm.side_effect = lambda failure, repo: f"diff {failure.test_name}"
+
+            results = asyncio.run(generate_all())
+
+        assert [result.diff_content for result in results] == [
+            "diff test_0",
+            "diff test_1",
+            "diff test_2",
+        ]
+
+
+def test_is_cosmetic_patch(tmp_path: Path) -> None:
+    """Test that only comment and formatting changes count as cosmetic."""
+    (tmp_path / "example.py").write_text("def example():\n    return 1\n")
+    header = "--- a/example.py\n+++ b/example.py\n@@ -1,2 +1,3 @@\n"
+
+    comment_diff = header + "+# Explain the example\n def example():\n     return 1\n"
+    code_diff = header + " def example():\n-    return 1\n+    return 2\n+\n"
+    missing_diff = comment_diff.replace("example.py", "missing.py")
+
+    assert is_cosmetic_patch(comment_diff, tmp_path) is True
+    assert is_cosmetic_patch(code_diff, tmp_path) is False
+    assert is_cosmetic_patch(missing_diff, tmp_path) is False
+    assert is_cosmetic_patch("", tmp_path) is False
+
+
+def test_diff_file_paths() -> None:
+    """Test that created, changed and deleted paths are listed once each."""
+    diff = (
+        "--- a/changed.py\n+++ b/changed.py\n@@ -1 +1 @@\n-a\n+b\n"
+        "--- /dev/null\n+++ b/created.py\n@@ -0,0 +1 @@\n+x\n"
+        "--- a/deleted.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-y\n"
+        "--- a/changed.py\n+++ b/changed.py\n@@ -5 +5 @@\n-c\n+d\n"
+    )
+
+    assert diff_file_paths(diff) == ["changed.py", "created.py", "deleted.py"]
+    assert diff_file_paths("not a diff") == []
+
+
+def test_apply_diff_exactly_refuses_inexact_diffs() -> None:
+    """Test that only diffs git would apply unchanged are applied."""
+    source = "a\nb\nc\n"
+    header = "--- a/x.py\n+++ b/x.py\n"
+
+    assert apply_diff_exactly(source, header + "@@ -2 +2,2 @@\n-b\n+B\n+C\n") == (
+        "a\nB\nC\nc\n"
+    )
+    # Wrong position, wrong header count, CRLF source, no final newline
+    assert apply_diff_exactly(source, header + "@@ -1 +1 @@\n-b\n+B\n") is None
+    assert apply_diff_exactly(source, header + "@@ -2,2 +2 @@\n-b\n+B\n") is None
+    assert apply_diff_exactly("a\r\nb\r\n", header + "@@ -2 +2 @@\n-b\n+B\n") is None
+    assert apply_diff_exactly("a\nb", header + "@@ -1 +1 @@\n-a\n+A\n") is None
+
+
+def test_generate_patch_reuses_cached_patch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a recurring failure is answered from the patch cache."""
+    monkeypatch.delenv("DEV_AGENT_CACHE", raising=False)
+    (tmp_path / "example.py").write_text("def example():\n    return 1\n")
+    diff = (
+        "--- a/example.py\n+++ b/example.py\n@@ -1,2 +1,2 @@\n"
+        " def example():\n-    return 1\n+    return 2\n"
+    )
+    generator = LLMPatchGenerator(model_path="test_model.gguf")
+    first = TestFailure("test_example", "example.py", "<Foo at 0x7f01> in 0.12s")
+    again = TestFailure("test_example", "example.py", "<Foo at 0x7f99> in 0.34s")
+
+    with patch.object(generator, "_call_llm", return_value=diff) as mock_llm:
+        result = generator.generate_patch(first, tmp_path)
+        # Unverified patches are not cached
+        assert generator.generate_patch(again, tmp_path).diff_content == diff
+        assert mock_llm.call_count == 2
+
+        generator.cache_patch(result)
+        assert generator.generate_patch(again, tmp_path).diff_content == diff
+        assert mock_llm.call_count == 2
+
+        monkeypatch.setenv("DEV_AGENT_CACHE", "off")
+        generator.generate_patch(again, tmp_path)
+        assert mock_llm.call_count == 3
+
+    cache_dir = tmp_path / ".dev-agent-cache"
+    assert (cache_dir / ".gitignore").read_text() == "*\n"
+    assert len(list(cache_dir.glob("*.diff"))) == 1
@@ -5,6 +5,8 @@ for the dev-agent system. These metrics are part of Phase 5 features
 to track performance, iteration counts, and success rates.
 """
 
+import json
+from dataclasses import asdict
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -110,7 +112,7 @@ class TestMetricsCollection:
     @pytest.fixture
     def temp_metrics_file(self, tmp_path: Path) -> Path:
         """Create a temporary metrics file for testing."""
-        metrics_file = tmp_path / "metrics.json"
+        metrics_file = tmp_path / "metrics.jsonl"
         return metrics_file
 
     def test_metrics_storage_save_load(self, temp_metrics_file: Path) -> None:
@@ -142,6 +144,92 @@ class TestMetricsCollection:
         assert loaded_metrics.total_iterations == 1
         assert loaded_metrics.successful_patches == 1
 
+    def test_metrics_storage_append_patch_result(self, temp_metrics_file: Path) -> None:
+        """Test that appended results are kept alongside saved ones."""
+        storage = MetricsStorage(metrics_file=temp_metrics_file)
+        for success in (True, False):
+            storage.append_patch_result(
+                PatchMetrics(
+                    test_name="test_example",
+                    llm_backend="ollama",
+                    model_name="codellama",
+                    iterations=2,
+                    success=success,
+                    duration_ms=500,
+                )
+            )
+
+        loaded_metrics = storage.load_metrics()
+
+        assert len(loaded_metrics.patch_results) == 2
+        assert loaded_metrics.successful_patches == 1
+        assert loaded_metrics.failed_patches == 1
+        assert len(temp_metrics_file.read_text().splitlines()) == 2
+
+    def test_metrics_storage_load_corrupt_file(self, temp_metrics_file: Path) -> None:
+        """Test that unreadable metrics records are skipped on load."""
+        temp_metrics_file.write_bytes(b"\xff{not json")
+        storage = MetricsStorage(metrics_file=temp_metrics_file)
+
+        loaded_metrics = storage.load_metrics()
+
+        assert loaded_metrics.patch_results == []
+
+    def test_metrics_storage_converts_legacy_json_file(
+        self, temp_metrics_file: Path
+    ) -> None:
+        """Test that a metrics file in the old JSON format keeps its history."""
+        legacy = PatchMetrics(
+            test_name="test_old",
+            llm_backend="llama-cpp",
+            model_name="codellama",
+            iterations=3,
+            success=False,
+            duration_ms=2000,
+        )
+        temp_metrics_file.write_text(
+            json.dumps({"patch_results": [asdict(legacy)]}, indent=2)
+        )
+        storage = MetricsStorage(metrics_file=temp_metrics_file)
+
+        storage.append_patch_result(
+            PatchMetrics(
+                test_name="test_new",
+                llm_backend="ollama",
+                model_name="codellama",
+                iterations=1,
+                success=True,
+                duration_ms=500,
+            )
+        )
+
+        loaded = MetricsStorage(metrics_file=temp_metrics_file).load_metrics()
+        assert [r.test_name for r in loaded.patch_results] == ["test_old", "test_new"]
+        assert len(temp_metrics_file.read_text().splitlines()) == 2
+
+    def test_metrics_storage_migrates_default_legacy_file(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that ~/.dev-agent/metrics.json is carried over to the new log."""
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        legacy_file = tmp_path / ".dev-agent" / "metrics.json"
+        legacy_file.parent.mkdir()
+        legacy = PatchMetrics(
+            test_name="test_old",
+            llm_backend="llama-cpp",
+            model_name="codellama",
+            iterations=1,
+            success=True,
+            duration_ms=100,
+        )
+        legacy_file.write_text(json.dumps({"patch_results": [asdict(legacy)]}))
+
+        loaded = MetricsStorage().load_metrics()
+
+        assert loaded.patch_results == [legacy]
+        assert (tmp_path / ".dev-agent" / "metrics.jsonl").exists()
+        assert legacy_file.exists()
+
     @patch("agent_lib.metrics.MetricsStorage")
     def test_record_metrics_decorator(self, mock_storage_class: MagicMock) -> None:
         """Test the record_metrics decorator."""
@@ -149,10 +237,6 @@ class TestMetricsCollection:
         mock_storage_instance = MagicMock()
         mock_storage_class.return_value = mock_storage_instance
 
-        # Mock loaded metrics
-        mock_metrics = DevAgentMetrics()
-        mock_storage_instance.load_metrics.return_value = mock_metrics
-
         # Define a test function with the decorator
         @record_metrics(llm_backend="llama-cpp", model_name="codellama")
         def test_function(test_name: str) -> bool:
@@ -166,8 +250,11 @@ class TestMetricsCollection:
         # Assert
         assert result1 is True
         assert result2 is False
-        # The decorator should have saved metrics twice
-        assert mock_storage_instance.save_metrics.call_count == 2
+        # The decorator should reuse one storage and append once per call
+        mock_storage_class.assert_called_once_with()
+        assert mock_storage_instance.append_patch_result.call_count == 2
+        mock_storage_instance.load_metrics.assert_not_called()
+        mock_storage_instance.save_metrics.assert_not_called()
 
     def test_generate_metrics_report(self) -> None:
         """Test generating a metrics report."""
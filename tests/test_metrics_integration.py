@@ -4,13 +4,14 @@ This test suite covers how the dev_agent orchestrator records and uses
 metrics during the patch generation process.
 """
 
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
 from pytest import MonkeyPatch
 
 import dev_agent
-from agent_lib.metrics import DevAgentMetrics
+from agent_lib.metrics import DevAgentMetrics, MetricsStorage
 
 
 class TestDevAgentMetricsIntegration:
@@ -30,6 +31,7 @@ class TestDevAgentMetricsIntegration:
         mock_test_runner.run_tests.side_effect = [
             {"passed": False, "failures": [test_failure]},
             {"passed": True, "failures": []},
+            {"passed": True, "failures": []},
         ]
 
         # Mock LLM patch generator
@@ -82,17 +84,17 @@ class TestDevAgentMetricsIntegration:
 
         # Assert
         assert exc_info.value.code == 0
-        mock_metrics_storage.save_metrics.assert_called_once()
-
-        # Verify metrics content by capturing the argument to save_metrics
-        saved_metrics = mock_metrics_storage.save_metrics.call_args[0][0]
-        assert len(saved_metrics.patch_results) == 1
-        assert saved_metrics.patch_results[0].test_name == "test_example"
-        assert saved_metrics.patch_results[0].llm_backend == "llama-cpp"
-        assert saved_metrics.patch_results[0].model_name == "codellama"
-        assert saved_metrics.patch_results[0].iterations == 1
-        assert saved_metrics.patch_results[0].success is True
-        assert saved_metrics.patch_results[0].duration_ms == 1300  # 1.3 seconds
+        mock_metrics_storage.append_patch_result.assert_called_once()
+        mock_metrics_storage.save_metrics.assert_not_called()
+
+        # Verify metrics content by capturing the appended result
+        saved_result = mock_metrics_storage.append_patch_result.call_args[0][0]
+        assert saved_result.test_name == "test_example"
+        assert saved_result.llm_backend == "llama-cpp"
+        assert saved_result.model_name == "codellama"
+        assert saved_result.iterations == 1
+        assert saved_result.success is True
+        assert saved_result.duration_ms == 1300  # 1.3 seconds
 
     def test_max_iterations_records_failure_metrics(
         self, monkeypatch: MonkeyPatch
@@ -162,14 +164,60 @@ class TestDevAgentMetricsIntegration:
 
         # Assert
         assert exc_info.value.code == 1
-        mock_metrics_storage.save_metrics.assert_called_once()
+        mock_metrics_storage.append_patch_result.assert_called_once()
+        mock_metrics_storage.save_metrics.assert_not_called()
 
         # Verify metrics content
-        saved_metrics = mock_metrics_storage.save_metrics.call_args[0][0]
-        assert len(saved_metrics.patch_results) == 1
-        assert saved_metrics.patch_results[0].test_name == "test_persistent_failure"
-        assert saved_metrics.patch_results[0].llm_backend == "ollama"
-        assert saved_metrics.patch_results[0].model_name == "phi"
-        assert saved_metrics.patch_results[0].iterations == 2  # Max iterations
-        assert saved_metrics.patch_results[0].success is False
-        assert saved_metrics.patch_results[0].duration_ms == 3000  # 3 seconds
+        saved_result = mock_metrics_storage.append_patch_result.call_args[0][0]
+        assert saved_result.test_name == "test_persistent_failure"
+        assert saved_result.llm_backend == "ollama"
+        assert saved_result.model_name == "phi"
+        assert saved_result.iterations == 2  # Max iterations
+        assert saved_result.success is False
+        assert saved_result.duration_ms == 3000  # 3 seconds
+
+    def test_runs_accumulate_in_metrics_file(
+        self, monkeypatch: MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that each run appends its result to the stored history."""
+        metrics_file = tmp_path / "metrics.jsonl"
+        mock_test_runner = MagicMock()
+        mock_test_runner.run_tests.return_value = {
+            "passed": False,
+            "failures": [
+                {
+                    "test_name": "test_persistent_failure",
+                    "file_path": "test_example.py",
+                    "error_output": "AssertionError: persistent error",
+                }
+            ],
+        }
+        mock_llm_generator = MagicMock()
+        mock_llm_generator.generate_patch.return_value.diff_content = ""
+
+        monkeypatch.setattr(
+            "dev_agent._load_config",
+            lambda: {
+                "max_iterations": 1,
+                "test_command": "pytest --maxfail=1",
+                "git": {"branch_prefix": "dev-agent/fix"},
+                "llm": {"model_path": "ollama:phi"},
+            },
+        )
+        monkeypatch.setattr("dev_agent.TestRunner", lambda x: mock_test_runner)
+        monkeypatch.setattr("dev_agent.LLMPatchGenerator", lambda x: mock_llm_generator)
+        monkeypatch.setattr("dev_agent.GitTool", lambda: MagicMock())
+        monkeypatch.setattr(
+            "dev_agent.MetricsStorage", lambda: MetricsStorage(metrics_file)
+        )
+
+        for _ in range(2):
+            with pytest.raises(SystemExit) as exc_info:
+                dev_agent.main()
+            assert exc_info.value.code == 1
+
+        history = MetricsStorage(metrics_file).load_metrics()
+        assert [r.test_name for r in history.patch_results] == [
+            "test_persistent_failure",
+            "test_persistent_failure",
+        ]
@@ -6,16 +6,28 @@ Following TDD principles for V1 enhancements.
 """
 
 from pathlib import Path
-from unittest.mock import patch
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 from agent_lib.llm_patch_generator import LLMPatchGenerator
 from agent_lib.test_runner import TestFailure
 
 
+@pytest.fixture
+def mock_read_text() -> Iterator[MagicMock]:
+    """Patch Path.read_text; tests set the file content or error to return."""
+    with patch("pathlib.Path.read_text") as mock:
+        yield mock
+
+
 class TestPromptContextExpansion:
     """Test suite for prompt context expansion functionality."""
 
-    def test_build_prompt_includes_full_file_context(self) -> None:
+    def test_build_prompt_includes_full_file_context(
+        self, mock_read_text: MagicMock
+    ) -> None:
         """Test that prompts include full file content for context."""
         generator = LLMPatchGenerator(model_path="test_model.gguf")
 
@@ -38,16 +50,18 @@ def test_example():
     assert example_function() == 2
 """
 
-        with patch("pathlib.Path.read_text", return_value=file_content):
-            prompt = generator.build_prompt(test_failure, Path("/test/repo"))
+        mock_read_text.return_value = file_content
+        prompt = generator.build_prompt(test_failure, Path("/test/repo"))
 
-            # Should include the full file content
-            assert "def example_function():" in prompt
-            assert "def other_function():" in prompt
-            assert "def test_example():" in prompt
-            assert "A simple example function." in prompt
+        # Should include the full file content
+        assert "def example_function():" in prompt
+        assert "def other_function():" in prompt
+        assert "def test_example():" in prompt
+        assert "A simple example function." in prompt
 
-    def test_build_prompt_includes_function_scope_context(self) -> None:
+    def test_build_prompt_includes_function_scope_context(
+        self, mock_read_text: MagicMock
+    ) -> None:
         """Test that prompts identify and highlight the specific function."""
         generator = LLMPatchGenerator(model_path="test_model.gguf")
 
@@ -71,19 +85,21 @@ def subtract(a, b):
     return a - b
 """
 
-        with patch("pathlib.Path.read_text", return_value=file_content):
-            prompt = generator.build_prompt(test_failure, Path("/test/repo"))
+        mock_read_text.return_value = file_content
+        prompt = generator.build_prompt(test_failure, Path("/test/repo"))
 
-            # Should include all functions for context
-            assert "def add(a, b):" in prompt
-            assert "def multiply(a, b):" in prompt
-            assert "def subtract(a, b):" in prompt
+        # Should include all functions for context
+        assert "def add(a, b):" in prompt
+        assert "def multiply(a, b):" in prompt
+        assert "def subtract(a, b):" in prompt
 
-            # Should include docstrings and comments
-            assert "Add two numbers." in prompt
-            assert "BUG: should be a * b" in prompt
+        # Should include docstrings and comments
+        assert "Add two numbers." in prompt
+        assert "BUG: should be a * b" in prompt
 
-    def test_build_prompt_handles_missing_file_gracefully(self) -> None:
+    def test_build_prompt_handles_missing_file_gracefully(
+        self, mock_read_text: MagicMock
+    ) -> None:
         """Test that prompt building handles missing files gracefully."""
         generator = LLMPatchGenerator(model_path="test_model.gguf")
 
@@ -93,13 +109,37 @@ def subtract(a, b):
             error_output="ModuleNotFoundError",
         )
 
-        with patch("pathlib.Path.read_text", side_effect=FileNotFoundError()):
-            prompt = generator.build_prompt(test_failure, Path("/test/repo"))
+        mock_read_text.side_effect = FileNotFoundError()
+        prompt = generator.build_prompt(test_failure, Path("/test/repo"))
+
+        # Should still include basic test information
+        assert "test_nonexistent" in prompt
+        assert "nonexistent.py" in prompt
+        assert "ModuleNotFoundError" in prompt
+
+        # Should include a note about missing file
+        assert "file content not available" in prompt.lower()
+
+    def test_build_prompt_truncates_long_error_output(self) -> None:
+        """Test that oversized tracebacks keep only their head and tail."""
+        generator = LLMPatchGenerator(model_path="test_model.gguf")
+
+        error_output = (
+            "Traceback (most recent call last):\n"
+            + "  middle frame\n" * 2000
+            + "AssertionError: assert 1 == 2"
+        )
+        test_failure = TestFailure(
+            test_name="test_example",
+            file_path="example.py",
+            error_output=error_output,
+        )
 
-            # Should still include basic test information
-            assert "test_nonexistent" in prompt
-            assert "nonexistent.py" in prompt
-            assert "ModuleNotFoundError" in prompt
+        prompt = generator.build_prompt(
+            test_failure, Path("/test/repo"), file_content="x = 1\n"
+        )
 
-            # Should include a note about missing file
-            assert "file content not available" in prompt.lower()
+        assert len(prompt) < len(error_output)
+        assert "Traceback (most recent call last):" in prompt
+        assert "AssertionError: assert 1 == 2" in prompt
+        assert "...[truncated]..." in prompt
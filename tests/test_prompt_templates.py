@@ -1,7 +1,11 @@
 """Tests for the prompt_templates module."""
 
 from agent_lib.prompt_templates import (
+    FORMAT_LINT_RETRY_TEMPLATE,
+    TEST_FAILURE_TEMPLATE,
     format_discovery_error_prompt,
+    format_format_lint_retry_prompt,
+    format_patch_prompt,
     format_syntax_error_retry_prompt,
     format_test_failure_prompt,
 )
@@ -100,3 +104,56 @@ def test_format_syntax_error_retry_prompt_includes_all_parameters():
     assert original_prompt in result
     assert previous_patch in result
     assert "IMPORTANT: Your previous patch had syntax errors." in result
+
+
+def test_format_patch_prompt_includes_file_content():
+    """Test that format_patch_prompt embeds the file content when available."""
+    result = format_patch_prompt(
+        test_name="test_feature",
+        file_path="path/to/module.py",
+        error_output="AssertionError: {not a placeholder}",
+        file_content="def feature():\n    return {}",
+    )
+
+    assert "- Test name: test_feature" in result
+    assert "- Error: AssertionError: {not a placeholder}" in result
+    assert "File Content (path/to/module.py):" in result
+    assert "```python\ndef feature():\n    return {}\n```" in result
+
+
+def test_format_patch_prompt_notes_missing_file():
+    """Test that format_patch_prompt notes when file content is unavailable."""
+    result = format_patch_prompt(
+        test_name="test_feature",
+        file_path="path/to/module.py",
+        error_output="ModuleNotFoundError",
+        file_content=None,
+    )
+
+    assert "Note: File content not available for path/to/module.py" in result
+    assert "```python" not in result
+
+
+def test_format_prompts_match_str_format():
+    """Test that precompiled templates render exactly like str.format."""
+    result = format_test_failure_prompt(
+        test_name="test_feature",
+        file_path="module.py",
+        error_output="KeyError: '{x}'",
+        full_context="d = {}",
+        patch_history="",
+    )
+    assert result == TEST_FAILURE_TEMPLATE.format(
+        test_name="test_feature",
+        file_path="module.py",
+        error_output="KeyError: '{x}'",
+        full_context="d = {}",
+        patch_history="None",
+    )
+
+    result = format_format_lint_retry_prompt(
+        original_prompt="Fix it", format_lint_errors="E501", previous_patch="diff"
+    )
+    assert result == FORMAT_LINT_RETRY_TEMPLATE.format(
+        original_prompt="Fix it", format_lint_errors="E501", previous_patch="diff"
+    )
@@ -4,7 +4,10 @@ Tests for the supervisor's ability to retry failed subtasks according to
 configuration and handle retry exhaustion gracefully.
 """
 
+import io
 import json
+import sys
+from contextlib import redirect_stdout
 from unittest.mock import MagicMock, patch
 
 
@@ -169,3 +172,29 @@ def test_supervisor_no_test_failures_not_retried():
         assert exit_code == 0
         # Should have made only 1 subprocess call (no retries for success)
         assert mock_run.call_count == 1
+
+
+def test_supervisor_in_process_runs_dev_agent_main():
+    """Test that in-process runs map dev-agent exits like a subprocess would."""
+    from dev_agent import NoTestsFoundError
+    from supervisor.supervisor import Supervisor
+
+    outcomes = [SystemExit(2), NoTestsFoundError("No test failures detected")]
+
+    def fake_main():
+        print("working", file=sys.stderr)
+        raise outcomes.pop(0)
+
+    with patch("dev_agent.main", side_effect=fake_main) as mock_main:
+        with patch("supervisor.supervisor.subprocess.run") as mock_run:
+            supervisor = Supervisor(max_retries=1, in_process=True)
+
+            captured_output = io.StringIO()
+            with redirect_stdout(captured_output):
+                exit_code = supervisor.run("Fix the bug.", dry_run=False)
+
+    assert exit_code == 0
+    assert mock_main.call_count == 2
+    mock_run.assert_not_called()
+    plan = json.loads(captured_output.getvalue())
+    assert plan["approval"]["status"] == "approved"
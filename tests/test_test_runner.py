@@ -6,8 +6,12 @@ and returns structured results.
 """
 
 from pathlib import Path
+from typing import Any, List
 
-from agent_lib.test_runner import run_tests
+import pytest
+
+from agent_lib import test_runner
+from agent_lib.test_runner import TestFailure, run_tests
 
 
 def test_run_tests_pass(tmp_path: Path) -> None:
@@ -60,6 +64,24 @@ def test_fail_two(): assert 1 == 2, "Second failure"
     assert all(f.file_path == "test_multiple.py" for f in result.failures)
 
 
+def test_run_tests_failure_sections_by_exact_nodeid(tmp_path: Path) -> None:
+    """Test that each failure gets its own section when names share a prefix."""
+    project = tmp_path / "toy_prefix_fail"
+    project.mkdir()
+    (project / "test_prefix.py").write_text(
+        """
+def test_fail_more(): assert 1 == 3, "Longer name"
+def test_fail(): assert 1 == 2, "Shorter name"
+"""
+    )
+    result = run_tests("pytest --disable-warnings", repo_path=project)
+
+    errors = {f.test_name: f.error_output for f in result.failures}
+    assert "Longer name" in errors["test_fail_more"]
+    assert "Shorter name" in errors["test_fail"]
+    assert "Longer name" not in errors["test_fail"]
+
+
 def test_run_tests_mixed_results(tmp_path: Path) -> None:
     """Test run_tests with mix of passing and failing tests."""
     project = tmp_path / "toy_mixed"
@@ -102,3 +124,113 @@ def test_run_tests_invalid_command(tmp_path: Path) -> None:
 
     assert result.passed is False
     assert result.raw_output  # Should contain error output
+
+
+def test_run_tests_accepts_token_list(tmp_path: Path) -> None:
+    """Test run_tests with the command already split into tokens."""
+    project = tmp_path / "toy_tokens"
+    project.mkdir()
+    (project / "test_sample.py").write_text("def test_always_fails(): assert 2 == 3\n")
+
+    result = run_tests(["pytest", "--maxfail=1", "--disable-warnings"], project)
+
+    assert result.passed is False
+    assert result.failures[0].test_name == "test_always_fails"
+
+
+def test_test_failure_is_immutable() -> None:
+    """Test that parsed failures cannot be modified after creation."""
+    failure = TestFailure(test_name="test_x", file_path="test_x.py", error_output="")
+
+    with pytest.raises(AttributeError):
+        failure.test_name = "other"  # type: ignore[misc]
+    assert not hasattr(failure, "__dict__")
+
+
+def test_parse_pytest_failures_caps_error_output() -> None:
+    """Test that huge failure sections are truncated to MAX_ERROR_BYTES."""
+    huge = "E   " + "x" * (test_runner.MAX_ERROR_BYTES * 2)
+    output = f"FAILED test_x.py::test_big - AssertionError\n{huge}\n"
+
+    (failure,) = test_runner._parse_pytest_failures(output)
+    (fallback,) = test_runner._parse_pytest_failures(huge)
+
+    for parsed in (failure, fallback):
+        assert parsed.error_output.endswith("…[truncated]")
+        assert len(parsed.error_output) < test_runner.MAX_ERROR_BYTES + 20
+
+
+def test_parse_pytest_failures_reuses_large_output_results(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the same large output is only parsed once."""
+    monkeypatch.setattr(test_runner, "_PARSE_CACHE", test_runner.OrderedDict())
+    output = "FAILED test_x.py::test_big - AssertionError\n" + "." * (
+        test_runner._PARSE_CACHE_MIN_CHARS
+    )
+    calls: List[str] = []
+    parse = test_runner._parse_failures
+
+    def counting_parse(text: str) -> List[TestFailure]:
+        calls.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(test_runner, "_parse_failures", counting_parse)
+
+    first = test_runner._parse_pytest_failures(output)
+    second = test_runner._parse_pytest_failures(output)
+
+    assert len(calls) == 1
+    assert first == second
+    assert first is not second
+    assert second[0].test_name == "test_big"
+
+
+def test_run_tests_decodes_undecodable_output(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that non-UTF-8 bytes and CRLF endings in output are tolerated."""
+
+    def fake_run(args: List[str], **kwargs: Any) -> Any:
+        kwargs["stdout"].write(b"FAILED test_x.py::test_bad - assert \xff\r\n")
+        kwargs["stdout"].write(b"E   boom\r\n")
+        return test_runner.subprocess.CompletedProcess(args=args, returncode=1)
+
+    monkeypatch.setattr(test_runner.subprocess, "run", fake_run)
+
+    result = run_tests("pytest", tmp_path)
+
+    assert result.failures[0].test_name == "test_bad"
+    assert result.failures[0].error_output == (
+        "FAILED test_x.py::test_bad - assert �\nE   boom"
+    )
+    assert result.exit_code == 1
+
+
+def test_run_tests_reports_unselectable_node_id(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that pytest's usage-error exit code is passed on to callers."""
+
+    def fake_run(args: List[str], **kwargs: Any) -> Any:
+        kwargs["stdout"].write(b"ERROR: not found: test_x.py::test_p[a\n")
+        return test_runner.subprocess.CompletedProcess(args=args, returncode=4)
+
+    monkeypatch.setattr(test_runner.subprocess, "run", fake_run)
+
+    result = run_tests("pytest 'test_x.py::test_p[a'", tmp_path)
+
+    assert not result.passed
+    assert result.exit_code == test_runner.PYTEST_USAGE_ERROR_EXIT_CODE
+
+
+def test_split_command_caches_prepared_tokens() -> None:
+    """Test that the pytest rewrite is part of the cached tokenization."""
+    test_runner._split_command.cache_clear()
+
+    first = test_runner._split_command("pytest --maxfail=1")
+    second = test_runner._split_command("pytest --maxfail=1")
+
+    assert first == ("python", "-m", "pytest", "--maxfail=1", "-v")
+    assert second is first
+    assert test_runner._split_command.cache_info().hits == 1